@@ -6,55 +6,83 @@ Uses in-memory storage - suitable for demo purposes.
 For production, consider Redis or a database.
 """
 
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+from itertools import islice
+from datetime import datetime
 from dataclasses import dataclass, field
+import sys
+import threading
+import time
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+NS_PER_SECOND = 1_000_000_000
+DEFAULT_MAX_MESSAGES = 100
+DEFAULT_NUM_SHARDS = 16
 
-@dataclass
+# Context summary formatting - anything that isn't the user is the assistant
+_ROLE_PREFIX = {"user": "User: ", "assistant": "Assistant: "}
+_DEFAULT_PREFIX = "Assistant: "
+CONTEXT_MESSAGE_MAX_CHARS = 500
+
+
+@dataclass(slots=True)
 class Message:
     """A single message in a conversation."""
     role: str  # "user" or "assistant"
     content: str
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: int = field(default_factory=time.monotonic_ns)  # Monotonic ns - for ordering/TTL, not display
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     """A conversation session with message history."""
     session_id: str
-    messages: List[Message] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.utcnow)
-    last_activity: datetime = field(default_factory=datetime.utcnow)
+    # Bounded: the oldest messages drop off automatically once full
+    messages: Deque[Message] = field(default_factory=lambda: deque(maxlen=DEFAULT_MAX_MESSAGES))
+    created_at: datetime = field(default_factory=datetime.utcnow)  # Wall clock, for display
+    last_activity: int = field(default_factory=time.monotonic_ns)  # Monotonic ns - for ordering/TTL, not display
+    # Last get_history result as (max_messages, history); reset by add_message
+    _history_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = field(default=None, repr=False, compare=False)
 
     def add_message(self, role: str, content: str) -> None:
         """Add a message to the conversation."""
-        self.messages.append(Message(role=role, content=content))
-        self.last_activity = datetime.utcnow()
+        # Roles are a tiny fixed set - intern so every message shares one string
+        self.messages.append(Message(role=sys.intern(role), content=content))
+        self.last_activity = time.monotonic_ns()
+        self._history_cache = None
+
+    def _recent(self, max_messages: int) -> List[Message]:
+        """Get the last max_messages messages, oldest first."""
+        start = max(0, len(self.messages) - max_messages)
+        return list(islice(self.messages, start, None))
 
     def get_history(self, max_messages: int = 20) -> List[Dict[str, str]]:
-        """Get recent message history as list of dicts."""
-        recent = self.messages[-max_messages:] if len(self.messages) > max_messages else self.messages
-        return [{"role": m.role, "content": m.content} for m in recent]
+        """
+        Get recent message history as list of dicts.
+
+        The list is cached until the next message, so repeated calls return
+        the same object - treat it as read-only.
+        """
+        cached = self._history_cache
+        if cached is not None and cached[0] == max_messages:
+            return cached[1]
+        history = [{"role": m.role, "content": m.content} for m in self._recent(max_messages)]
+        self._history_cache = (max_messages, history)
+        return history
 
     def get_context_summary(self, max_messages: int = 10) -> str:
         """Get a text summary of recent conversation for LLM context."""
-        recent = self.messages[-max_messages:] if len(self.messages) > max_messages else self.messages
-        if not recent:
-            return ""
-
-        lines = []
-        for msg in recent:
-            prefix = "User" if msg.role == "user" else "Assistant"
-            # Truncate long messages for context
-            content = msg.content[:500] + "..." if len(msg.content) > 500 else msg.content
-            lines.append(f"{prefix}: {content}")
-
-        return "\n".join(lines)
+        limit = CONTEXT_MESSAGE_MAX_CHARS
+        # Truncate long messages for context
+        return "\n".join(
+            _ROLE_PREFIX.get(m.role, _DEFAULT_PREFIX)
+            + (m.content if len(m.content) <= limit else m.content[:limit] + "...")
+            for m in self._recent(max_messages)
+        )
 
 
 class ConversationStore:
@@ -65,92 +93,197 @@ class ConversationStore:
     - Automatic session creation
     - TTL-based expiration (default 1 hour)
     - Max messages per conversation (default 100)
+    - LRU eviction when over max sessions (default 1000)
+
+    Sessions are partitioned into shards by hashed session_id, each with its
+    own lock, so concurrent workers rarely contend and cleanup scans a
+    fraction of the sessions at a time. Within a shard, sessions are kept in
+    last-activity order (oldest first), so TTL expiry only looks at the front
+    of the dict. The session limit is store-wide: a shared count tracks every
+    shard, and eviction removes the oldest of the shards' front sessions.
     """
 
     def __init__(
         self,
         ttl_minutes: int = 60,
-        max_messages: int = 100,
-        max_sessions: int = 1000
+        max_messages: int = DEFAULT_MAX_MESSAGES,
+        max_sessions: int = 1000,
+        cleanup_interval_seconds: int = 30,
+        num_shards: int = DEFAULT_NUM_SHARDS
     ):
-        self._conversations: Dict[str, Conversation] = {}
-        self._ttl = timedelta(minutes=ttl_minutes)
+        self._shards: List[OrderedDict[str, Conversation]] = [OrderedDict() for _ in range(num_shards)]
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(num_shards)]
+        self._ttl_ns = ttl_minutes * 60 * NS_PER_SECOND
         self._max_messages = max_messages
-        self._max_sessions = max_sessions
+        self._max_sessions = max(1, max_sessions)
+        # Sessions across all shards. The count lock guards it and the sweep
+        # schedule below. Lock order is shard lock then count lock, never the
+        # reverse
+        self._session_count = 0
+        self._count_lock = threading.Lock()
+        # Shards are swept round-robin, one every interval/num_shards, so the
+        # whole store is still covered once per cleanup interval
+        self._shard_cleanup_interval_ns = cleanup_interval_seconds * NS_PER_SECOND // num_shards
+        self._last_cleanup = time.monotonic_ns()
+        self._cleanup_cursor = 0
+
+    def _shard_for(self, session_id: str) -> Tuple[OrderedDict, threading.Lock]:
+        """Get the shard holding a session and the lock guarding it."""
+        index = hash(session_id) % len(self._shards)
+        return self._shards[index], self._locks[index]
 
     def get_or_create_session(self, session_id: Optional[str] = None) -> str:
         """Get existing session or create a new one."""
         # Clean up expired sessions periodically
         self._cleanup_expired()
 
-        if session_id and session_id in self._conversations:
-            return session_id
-
-        # Create new session
         new_id = session_id or str(uuid.uuid4())
-        self._conversations[new_id] = Conversation(session_id=new_id)
-        logger.info(f"Created new conversation session: {new_id}")
+        shard, lock = self._shard_for(new_id)
+        with lock:
+            if self._live_session(shard, new_id) is None:
+                self._create_session(shard, new_id)
+        self._evict_over_limit()
         return new_id
 
+    def _live_session(self, shard: OrderedDict, session_id: str) -> Optional[Conversation]:
+        """
+        Get a session, dropping it if idle past the TTL. Caller holds the lock.
+
+        The periodic sweep reaches each shard only now and then, so lookups
+        check expiry themselves rather than resume a stale conversation.
+        """
+        conversation = shard.get(session_id)
+        if conversation is None:
+            return None
+        if time.monotonic_ns() - conversation.last_activity > self._ttl_ns:
+            del shard[session_id]
+            self._forget(1)
+            logger.info(f"Expired conversation session: {session_id}")
+            return None
+        return conversation
+
+    def _create_session(self, shard: OrderedDict, session_id: str) -> Conversation:
+        """
+        Create a session in a shard. Caller holds the lock.
+
+        The store may then be over its limit - call _evict_over_limit once the
+        shard lock is released.
+        """
+        conversation = Conversation(
+            session_id=session_id,
+            messages=deque(maxlen=self._max_messages)
+        )
+        shard[session_id] = conversation
+        with self._count_lock:
+            self._session_count += 1
+        logger.info(f"Created new conversation session: {session_id}")
+        return conversation
+
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """Add a message to a conversation."""
-        if session_id not in self._conversations:
-            self.get_or_create_session(session_id)
+        shard, lock = self._shard_for(session_id)
+        with lock:
+            conversation = self._live_session(shard, session_id)
+            created = conversation is None
+            if created:
+                conversation = self._create_session(shard, session_id)
+            conversation.add_message(role, content)
+            shard.move_to_end(session_id)
+        if created:
+            self._evict_over_limit()
+
+    def _evict_over_limit(self) -> None:
+        """Evict the least recently active sessions until the store is within its limit."""
+        while self._session_count > self._max_sessions:
+            # Each shard's oldest session is at its front, so the store's
+            # oldest is the oldest of those. Shards are locked one at a time
+            oldest = None
+            for index, (shard, lock) in enumerate(zip(self._shards, self._locks)):
+                with lock:
+                    if shard:
+                        sid, conv = next(iter(shard.items()))
+                        if oldest is None or conv.last_activity < oldest[0]:
+                            oldest = (conv.last_activity, index, sid)
+            if oldest is None:
+                return
 
-        conversation = self._conversations[session_id]
-        conversation.add_message(role, content)
+            last_activity, index, sid = oldest
+            with self._locks[index]:
+                shard = self._shards[index]
+                # Rescan if the session was touched or removed meanwhile
+                conv = shard.get(sid)
+                if conv is None or conv.last_activity != last_activity:
+                    continue
+                del shard[sid]
+                self._forget(1)
+            logger.info(f"Removed old session due to limit: {sid}")
 
-        # Trim if too many messages
-        if len(conversation.messages) > self._max_messages:
-            conversation.messages = conversation.messages[-self._max_messages:]
+    def _forget(self, count: int) -> None:
+        """Take removed sessions off the store-wide count."""
+        with self._count_lock:
+            self._session_count -= count
 
     def get_history(self, session_id: str, max_messages: int = 20) -> List[Dict[str, str]]:
         """Get conversation history for a session."""
-        if session_id not in self._conversations:
-            return []
-        return self._conversations[session_id].get_history(max_messages)
+        shard, lock = self._shard_for(session_id)
+        with lock:
+            conversation = self._live_session(shard, session_id)
+            if conversation is None:
+                return []
+            return conversation.get_history(max_messages)
 
     def get_context_summary(self, session_id: str, max_messages: int = 10) -> str:
         """Get conversation context summary for LLM routing."""
-        if session_id not in self._conversations:
-            return ""
-        return self._conversations[session_id].get_context_summary(max_messages)
+        shard, lock = self._shard_for(session_id)
+        with lock:
+            conversation = self._live_session(shard, session_id)
+            if conversation is None:
+                return ""
+            return conversation.get_context_summary(max_messages)
 
     def clear_session(self, session_id: str) -> None:
         """Clear a specific session."""
-        if session_id in self._conversations:
-            del self._conversations[session_id]
-            logger.info(f"Cleared conversation session: {session_id}")
+        shard, lock = self._shard_for(session_id)
+        with lock:
+            if shard.pop(session_id, None) is not None:
+                self._forget(1)
+                logger.info(f"Cleared conversation session: {session_id}")
 
     def clear_all(self) -> int:
         """Clear all conversation sessions. Returns count of cleared sessions."""
-        count = len(self._conversations)
-        self._conversations.clear()
+        count = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                count += len(shard)
+                self._forget(len(shard))
+                shard.clear()
         logger.info(f"Cleared all {count} conversation sessions")
         return count
 
     def _cleanup_expired(self) -> None:
-        """Remove expired sessions."""
-        now = datetime.utcnow()
-        expired = [
-            sid for sid, conv in self._conversations.items()
-            if now - conv.last_activity > self._ttl
-        ]
-        for sid in expired:
-            del self._conversations[sid]
-            logger.info(f"Expired conversation session: {sid}")
+        """Sweep the next shard for expired sessions (throttled, round-robin)."""
+        now = time.monotonic_ns()
+        # Claim the next shard under the count lock, so concurrent callers
+        # neither double-sweep a shard nor skip one
+        with self._count_lock:
+            if now - self._last_cleanup < self._shard_cleanup_interval_ns:
+                return
+            self._last_cleanup = now
+            index = self._cleanup_cursor
+            self._cleanup_cursor = (index + 1) % len(self._shards)
+        with self._locks[index]:
+            self._expire_sessions(self._shards[index], now)
 
-        # Also enforce max sessions limit
-        if len(self._conversations) > self._max_sessions:
-            # Remove oldest sessions
-            sorted_sessions = sorted(
-                self._conversations.items(),
-                key=lambda x: x[1].last_activity
-            )
-            to_remove = len(self._conversations) - self._max_sessions
-            for sid, _ in sorted_sessions[:to_remove]:
-                del self._conversations[sid]
-                logger.info(f"Removed old session due to limit: {sid}")
+    def _expire_sessions(self, shard: OrderedDict, now: int) -> None:
+        """Remove sessions in a shard idle for longer than the TTL. Caller holds the lock."""
+        # Oldest sessions are at the front - stop at the first live one
+        while shard:
+            sid, conv = next(iter(shard.items()))
+            if now - conv.last_activity <= self._ttl_ns:
+                break
+            del shard[sid]
+            self._forget(1)
+            logger.info(f"Expired conversation session: {sid}")
 
 
 # Global instance for the application
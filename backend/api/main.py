@@ -10,13 +10,15 @@ Features:
 """
 
 import os
+import json
 import logging
 import httpx
 from datetime import datetime, timedelta
 from fastapi import FastAPI, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
 from dotenv import load_dotenv
 
 from auth.okta_auth import get_okta_auth
@@ -132,26 +134,9 @@ async def root():
 
 # --- Chat Endpoint ---
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat(
-    request: ChatRequest,
-    authorization: Optional[str] = Header(None, alias="Authorization")
-):
-    """
-    Main chat endpoint.
-
-    This will:
-    1. Authenticate the user (via Okta token)
-    2. Route to appropriate agent(s) via orchestrator
-    3. Perform ID-JAG token exchange for each agent
-    4. Return response with agent flow and token exchanges
-    """
-    logger.info(f"=== Chat Request ===")
-    logger.info(f"Message: {request.message[:50]}...")
-    logger.info(f"Has auth header: {authorization is not None}")
-
+async def _authenticate(authorization: Optional[str]) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Extract and validate the user's bearer token. Returns (token, user_info)."""
     okta_auth = get_okta_auth()
-    user_info = None
 
     # Extract user token
     user_token = None
@@ -175,6 +160,29 @@ async def chat(
     else:
         user_info = {"email": "anonymous", "groups": []}
 
+    return user_token, user_info
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    authorization: Optional[str] = Header(None, alias="Authorization")
+):
+    """
+    Main chat endpoint.
+
+    This will:
+    1. Authenticate the user (via Okta token)
+    2. Route to appropriate agent(s) via orchestrator
+    3. Perform ID-JAG token exchange for each agent
+    4. Return response with agent flow and token exchanges
+    """
+    logger.info(f"=== Chat Request ===")
+    logger.info(f"Message: {request.message[:50]}...")
+    logger.info(f"Has auth header: {authorization is not None}")
+
+    user_token, user_info = await _authenticate(authorization)
+
     # Get or create conversation session
     session_id = conversation_store.get_or_create_session(request.session_id)
 
@@ -218,6 +226,64 @@ async def chat(
         )
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    authorization: Optional[str] = Header(None, alias="Authorization")
+):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Same flow as /api/chat, but the synthesized response is sent as it is
+    generated: "token" events carry text chunks, and a final "done" event
+    carries the full ChatResponse (content, agent flow, token exchanges).
+    """
+    logger.info(f"=== Chat Stream Request ===")
+    logger.info(f"Message: {request.message[:50]}...")
+
+    user_token, user_info = await _authenticate(authorization)
+
+    session_id = conversation_store.get_or_create_session(request.session_id)
+    conversation_context = conversation_store.get_context_summary(session_id, max_messages=6)
+    conversation_store.add_message(session_id, "user", request.message)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            orchestrator = Orchestrator(
+                user_token=user_token or "",
+                user_info=user_info
+            )
+            async for event in orchestrator.stream(request.message, conversation_context):
+                if event["type"] == "token":
+                    yield f"event: token\ndata: {json.dumps({'content': event['content']})}\n\n"
+                    continue
+
+                conversation_store.add_message(session_id, "assistant", event["content"])
+                response = ChatResponse(
+                    content=event["content"],
+                    session_id=session_id,
+                    agent_flow=[AgentFlowStep(**step) for step in event["agent_flow"]],
+                    token_exchanges=[TokenExchange(**ex) for ex in event["token_exchanges"]],
+                    user_info=user_info
+                )
+                yield f"event: done\ndata: {response.model_dump_json()}\n\n"
+
+        except Exception as e:
+            logger.error(f"Orchestrator error: {e}")
+            response = ChatResponse(
+                content=f"I encountered an error processing your request: {str(e)}",
+                session_id=session_id,
+                agent_flow=[
+                    AgentFlowStep(step="error", action=str(e), status="error")
+                ],
+                token_exchanges=[],
+                user_info=user_info
+            )
+            yield f"event: done\ndata: {response.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 # --- Agent Status Endpoint ---
 
 @app.get("/api/agents/status")
@@ -9,10 +9,12 @@ When a user doesn't have access to an agent (based on group membership),
 the exchange returns access_denied instead of failing.
 """
 
+import asyncio
 import logging
 import os
 import json
-from typing import Dict, Any, Optional, List
+import re
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
 from .agent_config import (
@@ -32,6 +34,67 @@ try:
 except ImportError as e:
     logger.warning(f"Okta AI SDK not available: {e}. Using demo mode.")
 
+# Okta error messages that mean the user's policy doesn't allow the exchange
+POLICY_DENIED_KEYWORDS = (
+    "no_matching_policy",
+    "access_denied",
+    "policy evaluation failed",
+    "policy_evaluation_failed",
+    "authorization server token exchange failed"
+)
+# Exceptions that mean the call never got a usable answer - worth retrying
+TRANSIENT_EXCEPTIONS = (TimeoutError, asyncio.TimeoutError, ConnectionError)
+# Error messages from HTTP clients and Okta that mean the failure is transient
+TRANSIENT_ERROR_KEYWORDS = (
+    "timed out",
+    "timeout",
+    "connection reset",
+    "connection aborted",
+    "connection refused",
+    "temporarily_unavailable",
+    "server_error"
+)
+# HTTP 5xx status quoted in an error message, e.g. "HTTP 503" or "status code: 502"
+_SERVER_ERROR_STATUS = re.compile(r"\b(?:http|status(?: code)?)\W*5\d\d\b")
+# Backoff before each retry of a failed exchange call (seconds)
+EXCHANGE_RETRY_DELAYS = (0.1, 0.2, 0.4)
+
+
+def _is_policy_denial(error_lower: str) -> bool:
+    """Check whether a (lowercased) exchange error is an access policy denial."""
+    return any(keyword in error_lower for keyword in POLICY_DENIED_KEYWORDS)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """HTTP status attached to an exception (or its response), if any."""
+    for source in (error, getattr(error, "response", None)):
+        status = getattr(source, "status_code", None) or getattr(source, "status", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Check whether an exchange error is known to be transient.
+
+    Only timeouts, dropped connections, HTTP 5xx and Okta's
+    temporarily_unavailable / server_error are retried - anything else
+    (policy denials, invalid grants, bugs) is raised straight away.
+    """
+    if isinstance(error, TRANSIENT_EXCEPTIONS):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return 500 <= status < 600
+    error_lower = str(error).lower()
+    if _is_policy_denial(error_lower):
+        return False
+    return (
+        any(keyword in error_lower for keyword in TRANSIENT_ERROR_KEYWORDS)
+        or _SERVER_ERROR_STATUS.search(error_lower) is not None
+    )
+
 
 class MultiAgentTokenExchange:
     """
@@ -52,6 +115,10 @@ class MultiAgentTokenExchange:
         # SDK instances per agent
         self._sdks: Dict[str, OktaAISDK] = {}
         self._configs: Dict[str, OktaAIConfig] = {}
+        # Main auth server SDKs (for ID-JAG exchange), keyed by agent_id
+        self._main_sdks: Dict[str, OktaAISDK] = {}
+        # Exchanges currently running, so identical concurrent requests share one
+        self._inflight: Dict[Tuple[str, str, Tuple[str, ...]], asyncio.Future] = {}
 
         if SDK_AVAILABLE:
             self._initialize_sdks()
@@ -106,6 +173,24 @@ class MultiAgentTokenExchange:
             - agent_info: Dict
             - error: str (if failed)
         """
+        key = (agent_type, user_id_token, tuple(requested_scopes or ()))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._exchange_token(agent_type, user_id_token, requested_scopes))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller being cancelled doesn't cancel the shared exchange;
+        # callers get their own copy since they annotate the result
+        result = await asyncio.shield(task)
+        return dict(result)
+
+    async def _exchange_token(
+        self,
+        agent_type: str,
+        user_id_token: str,
+        requested_scopes: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Perform the two-step token exchange for one agent."""
         config = get_agent_config(agent_type)
         if not config:
             return self._demo_result(agent_type, user_id_token, requested_scopes)
@@ -131,7 +216,10 @@ class MultiAgentTokenExchange:
             if not main_sdk:
                 return self._error_result(agent_type, config, "Main SDK not available")
 
-            id_jag_result = main_sdk.cross_app_access.exchange_id_token(
+            # The SDK is synchronous - run its HTTP calls off the event loop
+            id_jag_result = await self._call_with_retry(
+                agent_type,
+                main_sdk.cross_app_access.exchange_id_token,
                 id_token=user_id_token,
                 audience=target_audience,
                 scope=scope_string
@@ -149,7 +237,9 @@ class MultiAgentTokenExchange:
                 private_jwk=okta_config.private_jwk
             )
 
-            token_result = sdk.cross_app_access.exchange_id_jag_for_auth_server_token(
+            token_result = await self._call_with_retry(
+                agent_type,
+                sdk.cross_app_access.exchange_id_jag_for_auth_server_token,
                 auth_server_request
             )
 
@@ -180,14 +270,7 @@ class MultiAgentTokenExchange:
             error_str = str(e).lower()
 
             # Check for access denied errors (various error messages from Okta)
-            policy_denied_keywords = [
-                "no_matching_policy",
-                "access_denied",
-                "policy evaluation failed",
-                "policy_evaluation_failed",
-                "authorization server token exchange failed"
-            ]
-            if any(keyword in error_str for keyword in policy_denied_keywords):
+            if _is_policy_denial(error_str):
                 logger.info(f"[{agent_type}] ACCESS DENIED for user - policy restriction. Requested scopes: {scopes}")
                 return {
                     "success": False,
@@ -210,11 +293,32 @@ class MultiAgentTokenExchange:
             logger.error(f"[{agent_type}] Token exchange failed: {e}")
             return self._error_result(agent_type, config, str(e), scopes)
 
+    async def _call_with_retry(self, agent_type: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking SDK call in a worker thread, retrying transient failures.
+
+        Transient errors (see _is_retryable) are retried after each delay in
+        EXCHANGE_RETRY_DELAYS; anything else is raised immediately.
+        """
+        for delay in EXCHANGE_RETRY_DELAYS:
+            try:
+                return await asyncio.to_thread(func, *args, **kwargs)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                logger.warning(f"[{agent_type}] Token exchange call failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
     def _get_main_sdk(self, agent_config: AgentConfig):
         """Get or create an SDK for the main auth server (for ID-JAG exchange)."""
         if not SDK_AVAILABLE or not agent_config.private_key:
             return None
 
+        main_sdk = self._main_sdks.get(agent_config.agent_id)
+        if main_sdk is not None:
+            return main_sdk
+
         try:
             main_config = OktaAIConfig(
                 oktaDomain=self.okta_domain,
@@ -224,7 +328,9 @@ class MultiAgentTokenExchange:
                 principalId=agent_config.agent_id,
                 privateJWK=agent_config.private_key
             )
-            return OktaAISDK(main_config)
+            main_sdk = OktaAISDK(main_config)
+            self._main_sdks[agent_config.agent_id] = main_sdk
+            return main_sdk
         except Exception as e:
             logger.error(f"Failed to create main SDK: {e}")
             return None
@@ -278,7 +384,7 @@ class MultiAgentTokenExchange:
         agent_scopes: Optional[Dict[str, List[str]]] = None
     ) -> Dict[str, Dict[str, Any]]:
         """
-        Exchange tokens for multiple agents at once.
+        Exchange tokens for multiple agents at once (concurrently).
 
         Args:
             user_id_token: User's ID token
@@ -291,15 +397,14 @@ class MultiAgentTokenExchange:
         if agent_types is None:
             agent_types = [AGENT_SALES, AGENT_INVENTORY, AGENT_CUSTOMER, AGENT_PRICING]
 
-        results = {}
-        for agent_type in agent_types:
-            # Get specific scopes for this agent if provided
-            scopes = agent_scopes.get(agent_type) if agent_scopes else None
-            results[agent_type] = await self.exchange_token_for_agent(
-                agent_type, user_id_token, scopes
+        # Get specific scopes for each agent if provided
+        exchanges = await asyncio.gather(*(
+            self.exchange_token_for_agent(
+                agent_type, user_id_token, agent_scopes.get(agent_type) if agent_scopes else None
             )
-
-        return results
+            for agent_type in agent_types
+        ))
+        return dict(zip(agent_types, exchanges))
 
 
 # Singleton instance
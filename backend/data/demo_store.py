@@ -2,141 +2,522 @@
 Demo Data Store - Manages JSON-based data for ProGear Basketball demo.
 
 Provides access to inventory, pricing, customers, and discounts.
-Data persists to a JSON file and can be reset to initial state.
+Data persists to a live file (msgpack when available, JSON otherwise) and
+can be reset to initial state.
 """
 
+import atexit
+import bisect
 import json
 import os
 import shutil
 import logging
-from typing import Dict, List, Optional, Any
+import operator
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
 from pathlib import Path
+from types import MappingProxyType
+
+from data.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Prefer orjson for (de)serialization - falls back to the stdlib json module
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    logger.info("orjson not available, using stdlib json for demo data")
+
+# Live state is only read back by this process - persist it as msgpack when
+# installed; initial_data.json stays JSON for hand editing
+MSGPACK_AVAILABLE = False
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    logger.info("msgpack not available, persisting live demo data as JSON")
+
 # File paths
 DATA_DIR = Path(__file__).parent
 INITIAL_DATA_FILE = DATA_DIR / "initial_data.json"
-LIVE_DATA_FILE = DATA_DIR / "live_data.json"
+LEGACY_LIVE_DATA_FILE = DATA_DIR / "live_data.json"
+LIVE_DATA_FILE = DATA_DIR / "live_data.msgpack" if MSGPACK_AVAILABLE else LEGACY_LIVE_DATA_FILE
+LIVE_DATA_TMP_FILE = LIVE_DATA_FILE.with_name(LIVE_DATA_FILE.name + ".tmp")
+
+# Shared read-only default for .get() lookups, instead of a new {} per call
+_EMPTY: Any = MappingProxyType({})
+
+# Mutations are coalesced and written to the live file after this delay
+SAVE_DEBOUNCE_SECONDS = 1.0
+
+# Display markers for customer tiers (in tier order) and stock status, shared
+# by the orchestrator and the agent tools
+TIER_EMOJI = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}
+STATUS_ICON = {"low": "🔴", "good": "🟢"}
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize data to indented JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _load_live(raw: bytes) -> Any:
+    """Parse the live file contents."""
+    if MSGPACK_AVAILABLE:
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    return _loads(raw)
+
+
+def _dump_live(data: Any) -> bytes:
+    """Serialize data in the live file format."""
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(data, use_bin_type=True)
+    return _dumps(data)
+
+
+def _is_low_stock(item: Mapping[str, Any]) -> bool:
+    """Whether an inventory item needs reordering."""
+    return item.get("status") == "low" or item.get("quantity", 0) <= item.get("reorder_point", 0)
+
+
+@dataclass(slots=True)
+class _InventoryKeys:
+    """Lowercased searchable fields of an inventory item."""
+    name: str
+    category: str
+
+
+@dataclass(slots=True)
+class _CustomerKeys:
+    """Lowercased searchable fields of a customer."""
+    name: str
+    contact: str
+    location: str
+    tier: str
+
+
+class _SubstringIndex:
+    """
+    Substring search over several text fields of many records.
+
+    All (already lowercased) fields are joined into one haystack separated by
+    NUL, so a search is a handful of C-level str.find calls instead of an
+    interpreted loop over every field of every record. Each haystack offset
+    maps straight to its owning record.
+    """
+
+    __slots__ = ("_keys", "_starts", "_owner", "_haystack")
+
+    _SEP = "\x00"
+
+    def __init__(self, records: List[Tuple[str, List[str]]]):
+        self._keys: List[str] = []
+        self._starts: List[int] = []  # record start offsets, plus end sentinel
+        self._owner: List[int] = []  # haystack offset -> record position
+        parts: List[str] = []
+        offset = 0
+        for key, fields in records:
+            text = self._SEP.join(fields) + self._SEP
+            self._owner.extend([len(self._keys)] * len(text))
+            self._keys.append(key)
+            self._starts.append(offset)
+            parts.append(text)
+            offset += len(text)
+        self._starts.append(offset)
+        self._haystack = "".join(parts)
+
+    def find(self, query_lower: str) -> List[str]:
+        """Keys of records with a field containing the query, in record order."""
+        if not query_lower:
+            return list(self._keys)
+        if self._SEP in query_lower:
+            return []
+
+        find = self._haystack.find
+        starts = self._starts
+        owner = self._owner
+        keys = self._keys
+        matches = []
+        pos = find(query_lower)
+        while pos != -1:
+            index = owner[pos]
+            matches.append(keys[index])
+            # One hit per record - resume at the start of the next one
+            pos = find(query_lower, starts[index + 1])
+        return matches
 
 
 class DemoStore:
     """
-    Manages demo data with JSON persistence.
+    Manages demo data with file persistence.
 
     Features:
-    - Load/save data to JSON file
+    - Load/save data to the live file (writes are debounced, see flush())
     - Reset to initial state
     - CRUD operations for inventory, pricing, customers
-    - Thread-safe (single process assumption for demo)
+    - Thread-safe: reads of memoized views and all mutations hold one lock
     """
 
-    def __init__(self):
+    def __init__(self, flush_interval: float = SAVE_DEBOUNCE_SECONDS):
         self._data: Dict[str, Any] = {}
+        # References to the top-level sections of _data (see _bind_sections)
+        self._inventory: Dict[str, Any] = {}
+        self._pricing: Dict[str, Any] = {}
+        self._customers: Dict[str, Any] = {}
+        self._discounts: Dict[str, Any] = {}
+        # Read-only views handed out by the get_all_* accessors
+        self._inventory_view: Mapping[str, Any] = _EMPTY
+        self._pricing_view: Mapping[str, Any] = _EMPTY
+        self._customers_view: Mapping[str, Any] = _EMPTY
+        self._dirty = False
+        self._flush_interval = flush_interval
+        self._flush_timer: Optional[threading.Timer] = None
+        # Guards the data, the memo cache and the pending save. Reentrant, since
+        # memoized views are built from other memoized views
+        self._lock = threading.RLock()
+        # Bumped on every mutation; memoized views are keyed on it
+        self._version = 0
+        self._summary_cache: Dict[str, Tuple[int, Any]] = {}
+        # Lookup indexes derived from the loaded data (see _rebuild_indexes)
+        self._inventory_name_index: Dict[str, str] = {}
+        self._customer_name_index: Dict[str, str] = {}
+        self._inventory_lc: Dict[str, _InventoryKeys] = {}
+        self._customers_lc: Dict[str, _CustomerKeys] = {}
+        self._by_category: Dict[str, List[str]] = {}  # lowercased category -> [sku]
+        self._by_tier: Dict[str, List[str]] = {}  # lowercased tier -> [customer_id]
+        self._inventory_search = _SubstringIndex([])
+        self._customer_search = _SubstringIndex([])
+        self._inventory_name_matcher = KeywordMatcher([])  # lowercased name -> sku
+        self._customer_matcher = KeywordMatcher([])  # lowercased name/contact -> (customer_id, field)
+        self._customer_pos: Dict[str, int] = {}
+        # Column-oriented copy of inventory for aggregation (see _rebuild_inventory_columns)
+        self._skus: List[str] = []
+        self._sku_pos: Dict[str, int] = {}
+        self._qty: List[int] = []
+        self._price: List[float] = []
+        self._margin: List[Optional[float]] = []  # None for unpriced SKUs
+        self._category_codes: List[int] = []
+        self._category_names: List[str] = []
+        self._low_stock_skus: Set[str] = set()
+        # Volume discount thresholds sorted ascending, with matching discounts
+        self._volume_thresholds: List[int] = []
+        self._volume_discounts: List[int] = []
+        # Largest tier / volume discount on offer
+        self._max_tier_discount = 0
+        self._max_volume_discount = 0
         self._load_data()
+        # Make sure pending writes land on disk at interpreter shutdown
+        atexit.register(self.flush)
 
     def _load_data(self) -> None:
         """Load data from live file, or initialize from initial file."""
         if LIVE_DATA_FILE.exists():
             try:
-                with open(LIVE_DATA_FILE, 'r') as f:
-                    self._data = json.load(f)
+                self._data = _load_live(LIVE_DATA_FILE.read_bytes())
                 logger.info(f"Loaded live data from {LIVE_DATA_FILE}")
+                self._rebuild_indexes()
                 return
             except Exception as e:
                 logger.warning(f"Failed to load live data: {e}")
+        elif MSGPACK_AVAILABLE and LEGACY_LIVE_DATA_FILE.exists():
+            # State saved as JSON before msgpack was available - pick it up and
+            # save it again in the current format
+            try:
+                self._data = _loads(LEGACY_LIVE_DATA_FILE.read_bytes())
+                logger.info(f"Migrating live data from {LEGACY_LIVE_DATA_FILE} to {LIVE_DATA_FILE}")
+                self._rebuild_indexes()
+                self._save_data()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to load legacy live data: {e}")
 
         # Fall back to initial data
         self.reset_to_initial()
 
-    def _save_data(self) -> None:
-        """Save current data to live file."""
+    def _save_data(self, payload: Optional[bytes] = None) -> None:
+        """
+        Save current data (or an already-serialized payload) to live file.
+
+        The payload is written in one go to a temp file which then atomically
+        replaces the live file, so a crash mid-write never leaves it truncated.
+        """
         try:
-            with open(LIVE_DATA_FILE, 'w') as f:
-                json.dump(self._data, f, indent=2)
+            LIVE_DATA_TMP_FILE.write_bytes(payload if payload is not None else _dump_live(self._data))
+            os.replace(LIVE_DATA_TMP_FILE, LIVE_DATA_FILE)
             logger.debug("Data saved to live file")
         except Exception as e:
             logger.error(f"Failed to save data: {e}")
 
+    def _mark_dirty(self) -> None:
+        """
+        Record a mutation: invalidate memoized views and schedule a save.
+
+        Bursts of mutations are coalesced into a single write.
+        """
+        self._version += 1
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self._flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _cancel_flush_timer(self) -> None:
+        """Cancel a scheduled save. Caller must hold _lock."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def flush(self) -> None:
+        """Write pending changes to the live file immediately."""
+        with self._lock:
+            self._cancel_flush_timer()
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._save_data()
+
     def reset_to_initial(self) -> None:
         """Reset all data to initial state."""
-        try:
-            with open(INITIAL_DATA_FILE, 'r') as f:
-                self._data = json.load(f)
-            self._save_data()
-            logger.info("Data reset to initial state")
-        except Exception as e:
-            logger.error(f"Failed to reset data: {e}")
-            self._data = {"inventory": {}, "pricing": {}, "customers": {}, "discounts": {}}
+        with self._lock:
+            try:
+                raw = INITIAL_DATA_FILE.read_bytes()
+                self._data = _loads(raw)
+                self._version += 1
+                self._cancel_flush_timer()
+                self._dirty = False
+                # With JSON persistence the live data starts as an exact copy of
+                # the initial file, so write the bytes just read rather than
+                # re-serializing the parsed data
+                self._save_data(None if MSGPACK_AVAILABLE else raw)
+                logger.info("Data reset to initial state")
+            except Exception as e:
+                logger.error(f"Failed to reset data: {e}")
+                self._data = {"inventory": {}, "pricing": {}, "customers": {}, "discounts": {}}
+                self._version += 1
+            self._rebuild_indexes()
+
+    def _bind_sections(self) -> None:
+        """Cache references to the top-level sections so lookups skip the outer dict."""
+        self._inventory = self._data.setdefault("inventory", {})
+        self._pricing = self._data.setdefault("pricing", {})
+        self._customers = self._data.setdefault("customers", {})
+        self._discounts = self._data.setdefault("discounts", {})
+        # Proxies track the underlying dicts, so they only need rebuilding
+        # when the sections themselves are replaced (load/reset)
+        self._inventory_view = MappingProxyType(self._inventory)
+        self._pricing_view = MappingProxyType(self._pricing)
+        self._customers_view = MappingProxyType(self._customers)
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuild lookup indexes from the current data.
+
+        Names, categories, tiers etc. never change through the update_*
+        methods, so this only needs to run after the data is (re)loaded.
+        Lowercased copies of the searchable fields are kept alongside the
+        records (not inside them) so the persisted JSON stays clean.
+        """
+        self._bind_sections()
+
+        self._inventory_lc = {
+            sku: _InventoryKeys(
+                name=item.get("name", "").lower(),
+                category=item.get("category", "").lower(),
+            )
+            for sku, item in self._inventory.items()
+        }
+        self._customers_lc = {
+            cust_id: _CustomerKeys(
+                name=customer.get("name", "").lower(),
+                contact=customer.get("contact", "").lower(),
+                location=customer.get("location", "").lower(),
+                tier=customer.get("tier", "").lower(),
+            )
+            for cust_id, customer in self._customers.items()
+        }
+
+        self._inventory_name_index = {}
+        for sku, fields in self._inventory_lc.items():
+            self._inventory_name_index.setdefault(fields.name, sku)
+
+        self._customer_name_index = {}
+        for cust_id, fields in self._customers_lc.items():
+            self._customer_name_index.setdefault(fields.name, cust_id)
+
+        by_category = defaultdict(list)
+        for sku, fields in self._inventory_lc.items():
+            by_category[fields.category].append(sku)
+        self._by_category = dict(by_category)
+
+        by_tier = defaultdict(list)
+        for cust_id, fields in self._customers_lc.items():
+            by_tier[fields.tier].append(cust_id)
+        self._by_tier = dict(by_tier)
+
+        self._inventory_search = _SubstringIndex([
+            (sku, [fields.name, fields.category])
+            for sku, fields in self._inventory_lc.items()
+        ])
+        self._customer_search = _SubstringIndex([
+            (cust_id, [fields.name, fields.contact, fields.location])
+            for cust_id, fields in self._customers_lc.items()
+        ])
+        self._inventory_name_matcher = KeywordMatcher(
+            (fields.name, sku) for sku, fields in self._inventory_lc.items()
+        )
+        self._customer_matcher = KeywordMatcher(
+            entry
+            for cust_id, fields in self._customers_lc.items()
+            for entry in ((fields.name, (cust_id, "name")), (fields.contact, (cust_id, "contact")))
+        )
+        self._customer_pos = {cust_id: pos for pos, cust_id in enumerate(self._customers)}
+
+        self._rebuild_inventory_columns()
+        self._rebuild_discount_index()
+
+    def _rebuild_inventory_columns(self) -> None:
+        """
+        Build parallel per-SKU lists (quantity, price, margin, category code).
+
+        Aggregations then run over flat lists instead of nested dicts.
+        update_inventory_quantity / update_price patch the single slot
+        they change, so this only runs on (re)load.
+        """
+        inventory = self._inventory
+        pricing = self._pricing
+
+        self._skus = list(inventory)
+        self._sku_pos = {sku: pos for pos, sku in enumerate(self._skus)}
+        self._qty = [item.get("quantity", 0) for item in inventory.values()]
+        self._price = [pricing.get(sku, _EMPTY).get("price", 0) for sku in self._skus]
+        self._margin = [pricing[sku]["margin"] if sku in pricing else None for sku in self._skus]
+
+        codes: Dict[str, int] = {}
+        self._category_codes = [
+            codes.setdefault(item.get("category", "Other"), len(codes))
+            for item in inventory.values()
+        ]
+        self._category_names = list(codes)
+        self._low_stock_skus = {sku for sku, item in inventory.items() if _is_low_stock(item)}
+
+    def _rebuild_discount_index(self) -> None:
+        """
+        Pre-sort volume discount thresholds (stored as string keys) for bisect
+        lookups, and record the peak tier and volume discounts.
+        """
+        volume_discounts = self._discounts.get("volume_discounts", _EMPTY)
+        brackets = sorted((int(threshold), disc) for threshold, disc in volume_discounts.items())
+        self._volume_thresholds = [threshold for threshold, _ in brackets]
+        self._volume_discounts = [disc for _, disc in brackets]
+        self._max_tier_discount = max(self._discounts.get("tier_discounts", _EMPTY).values(), default=0)
+        self._max_volume_discount = max(self._volume_discounts, default=0)
+
+    @property
+    def version(self) -> int:
+        """Mutation counter; changes whenever any data in the store changes."""
+        return self._version
+
+    def _cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return a memoized value for key, recomputing it after any mutation."""
+        with self._lock:
+            cached = self._summary_cache.get(key)
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            value = compute()
+            self._summary_cache[key] = (self._version, value)
+            return value
 
     # ==================== INVENTORY ====================
 
-    def get_all_inventory(self) -> Dict[str, Any]:
-        """Get all inventory items."""
-        return self._data.get("inventory", {})
+    def get_all_inventory(self) -> Mapping[str, Any]:
+        """Get all inventory items (read-only view)."""
+        return self._inventory_view
 
     def get_inventory_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
         """Get a single inventory item by SKU."""
-        return self._data.get("inventory", {}).get(sku)
+        return self._inventory.get(sku)
 
     def get_inventory_by_category(self, category: str) -> Dict[str, Any]:
         """Get all inventory items in a category."""
-        inventory = self._data.get("inventory", {})
-        return {
-            sku: item for sku, item in inventory.items()
-            if item.get("category", "").lower() == category.lower()
-        }
+        inventory = self._inventory
+        return {sku: inventory[sku] for sku in self._by_category.get(category.lower(), ())}
 
     def get_inventory_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Find inventory item by name (prefers exact match, then best partial match)."""
-        inventory = self._data.get("inventory", {})
+        inventory = self._inventory
         name_lower = name.lower().strip()
 
         # First try exact match
-        for sku, item in inventory.items():
-            if item.get("name", "").lower() == name_lower:
-                return {**item, "sku": sku}
-
-        # Then try partial matches - collect all and pick the best
-        matches = []
-        for sku, item in inventory.items():
-            item_name = item.get("name", "").lower()
+        sku = self._inventory_name_index.get(name_lower)
+        if sku is not None:
+            return {**inventory[sku], "sku": sku}
+
+        # Then try partial matches - keep the best one in a single pass,
+        # preferring where the search term is the larger portion of the name
+        name_len = len(name_lower)
+        best_sku = None
+        best_score = -1.0
+        for item_name, sku in self._inventory_name_index.items():
             # Check if search term is in item name OR item name is in search term
             if name_lower in item_name or item_name in name_lower:
-                matches.append({**item, "sku": sku})
+                score = name_len / len(item_name) if item_name else 0.0
+                if score > best_score:
+                    best_sku, best_score = sku, score
 
-        if not matches:
+        if best_sku is None:
             return None
+        return {**inventory[best_sku], "sku": best_sku}
 
-        # Return the best match - prefer where search term is larger portion of name
-        def match_score(item):
-            item_name = item.get("name", "").lower()
-            if name_lower == item_name:
-                return 1000  # Exact match
-            return len(name_lower) / len(item_name) * 100
-
-        matches.sort(key=match_score, reverse=True)
-        return matches[0]
+    def find_in_text(self, text_lower: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the first inventory item (in inventory order) whose name appears in
+        the given lowercased text, e.g. a user request.
+        """
+        matched = self._inventory_name_matcher.scan(text_lower)
+        if not matched:
+            return None
+        sku = min(matched, key=self._sku_pos.__getitem__)
+        return {**self._inventory[sku], "sku": sku}
 
     def search_inventory(self, query: str) -> List[Dict[str, Any]]:
         """Search inventory by name or category."""
-        inventory = self._data.get("inventory", {})
-        query_lower = query.lower()
-        results = []
-        for sku, item in inventory.items():
-            if (query_lower in item.get("name", "").lower() or
-                query_lower in item.get("category", "").lower()):
-                results.append({**item, "sku": sku})
-        return results
+        inventory = self._inventory
+        return [
+            {**inventory[sku], "sku": sku}
+            for sku in self._inventory_search.find(query.lower())
+        ]
+
+    def search_inventory_limited(self, query: str, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Search inventory like search_inventory(), but only build the first
+        limit results. Returns (results, total number of matches).
+        """
+        inventory = self._inventory
+        skus = self._inventory_search.find(query.lower())
+        return [{**inventory[sku], "sku": sku} for sku in skus[:limit]], len(skus)
 
     def get_low_stock_items(self) -> List[Dict[str, Any]]:
         """Get all items with low stock status."""
-        inventory = self._data.get("inventory", {})
-        return [
-            {**item, "sku": sku}
-            for sku, item in inventory.items()
-            if item.get("status") == "low" or item.get("quantity", 0) <= item.get("reorder_point", 0)
-        ]
+        with self._lock:
+            inventory = self._inventory
+            return [
+                {**inventory[sku], "sku": sku}
+                for sku in sorted(self._low_stock_skus, key=self._sku_pos.__getitem__)
+            ]
 
     def update_inventory_quantity(self, sku: str, quantity_change: int, operation: str = "set") -> Dict[str, Any]:
         """
@@ -150,56 +531,62 @@ class DemoStore:
         Returns:
             Updated item info with previous and new quantities
         """
-        inventory = self._data.get("inventory", {})
-        if sku not in inventory:
-            # Try to find by name
-            item = self.get_inventory_by_name(sku)
-            if item:
-                sku = item.get("sku")
+        with self._lock:
+            inventory = self._inventory
+            if sku not in inventory:
+                # Try to find by name
+                item = self.get_inventory_by_name(sku)
+                if item:
+                    sku = item.get("sku")
+                else:
+                    return {"error": f"Product not found: {sku}"}
+
+            item = inventory[sku]
+            previous_qty = item["quantity"]
+
+            if operation == "increase":
+                item["quantity"] = previous_qty + quantity_change
+            elif operation == "decrease":
+                item["quantity"] = max(0, previous_qty - quantity_change)
+            elif operation == "set":
+                item["quantity"] = quantity_change
             else:
-                return {"error": f"Product not found: {sku}"}
-
-        item = inventory[sku]
-        previous_qty = item["quantity"]
-
-        if operation == "increase":
-            item["quantity"] = previous_qty + quantity_change
-        elif operation == "decrease":
-            item["quantity"] = max(0, previous_qty - quantity_change)
-        elif operation == "set":
-            item["quantity"] = quantity_change
-        else:
-            return {"error": f"Unknown operation: {operation}"}
+                return {"error": f"Unknown operation: {operation}"}
 
-        # Update status based on quantity vs reorder point
-        reorder_point = item.get("reorder_point", 100)
-        if item["quantity"] <= reorder_point:
-            item["status"] = "low"
-        else:
-            item["status"] = "good"
+            # Update status based on quantity vs reorder point
+            reorder_point = item.get("reorder_point", 100)
+            if item["quantity"] <= reorder_point:
+                item["status"] = "low"
+            else:
+                item["status"] = "good"
 
-        self._save_data()
+            self._qty[self._sku_pos[sku]] = item["quantity"]
+            if _is_low_stock(item):
+                self._low_stock_skus.add(sku)
+            else:
+                self._low_stock_skus.discard(sku)
+            self._mark_dirty()
 
-        return {
-            "sku": sku,
-            "name": item["name"],
-            "previous_quantity": previous_qty,
-            "new_quantity": item["quantity"],
-            "change": item["quantity"] - previous_qty,
-            "status": item["status"]
-        }
+            return {
+                "sku": sku,
+                "name": item["name"],
+                "previous_quantity": previous_qty,
+                "new_quantity": item["quantity"],
+                "change": item["quantity"] - previous_qty,
+                "status": item["status"]
+            }
 
     # ==================== PRICING ====================
 
-    def get_all_pricing(self) -> Dict[str, Any]:
-        """Get all pricing data."""
-        return self._data.get("pricing", {})
+    def get_all_pricing(self) -> Mapping[str, Any]:
+        """Get all pricing data (read-only view)."""
+        return self._pricing_view
 
     def get_price_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
         """Get pricing for a product by SKU."""
-        pricing = self._data.get("pricing", {}).get(sku)
+        pricing = self._pricing.get(sku)
         if pricing:
-            inventory = self._data.get("inventory", {}).get(sku, {})
+            inventory = self._inventory.get(sku, _EMPTY)
             return {
                 "sku": sku,
                 "name": inventory.get("name", "Unknown"),
@@ -208,111 +595,160 @@ class DemoStore:
         return None
 
     def get_pricing_by_category(self, category: str) -> List[Dict[str, Any]]:
-        """Get pricing for all products in a category."""
-        inventory = self._data.get("inventory", {})
-        pricing = self._data.get("pricing", {})
+        """Get pricing for all products in a category (memoized until the next mutation)."""
+        category_lower = category.lower()
+        if category_lower not in self._by_category:
+            return []
+        return self._cached(
+            f"pricing_by_category:{category_lower}",
+            lambda: self._compute_pricing_by_category(category_lower),
+        )
+
+    def _compute_pricing_by_category(self, category_lower: str) -> List[Dict[str, Any]]:
+        inventory = self._inventory
+        pricing = self._pricing
 
         results = []
-        for sku, item in inventory.items():
-            if item.get("category", "").lower() == category.lower():
-                if sku in pricing:
-                    results.append({
-                        "sku": sku,
-                        "name": item["name"],
-                        **pricing[sku]
-                    })
+        for sku in self._by_category[category_lower]:
+            if sku in pricing:
+                results.append({
+                    "sku": sku,
+                    "name": inventory[sku]["name"],
+                    **pricing[sku]
+                })
         return results
 
-    def update_price(self, sku: str, new_price: float) -> Dict[str, Any]:
-        """Update the price of a product."""
-        pricing = self._data.get("pricing", {})
-        if sku not in pricing:
-            # Try to find by name
-            item = self.get_inventory_by_name(sku)
-            if item:
-                sku = item.get("sku")
-            else:
-                return {"error": f"Product not found: {sku}"}
-
-        if sku not in pricing:
-            return {"error": f"Pricing not found for: {sku}"}
-
-        old_price = pricing[sku]["price"]
-        pricing[sku]["price"] = new_price
-
-        # Recalculate margin
-        cost = pricing[sku]["cost"]
-        pricing[sku]["margin"] = round((new_price - cost) / new_price * 100, 1)
-
-        self._save_data()
-
-        inventory = self._data.get("inventory", {}).get(sku, {})
+    def get_category_margin_averages(self) -> Dict[str, float]:
+        """Get the average margin per category, in inventory order (memoized until the next mutation)."""
+        return self._cached("category_margin_averages", self._compute_category_margin_averages)
+
+    def _compute_category_margin_averages(self) -> Dict[str, float]:
+        num_categories = len(self._category_names)
+        counts = [0] * num_categories
+        totals = [0.0] * num_categories
+        for code, margin in zip(self._category_codes, self._margin):
+            if margin is not None:
+                counts[code] += 1
+                totals[code] += margin
         return {
-            "sku": sku,
-            "name": inventory.get("name", "Unknown"),
-            "old_price": old_price,
-            "new_price": new_price,
-            "margin": pricing[sku]["margin"]
+            name: totals[code] / counts[code]
+            for code, name in enumerate(self._category_names)
+            if counts[code]
         }
 
+    def update_price(self, sku: str, new_price: float) -> Dict[str, Any]:
+        """Update the price of a product."""
+        with self._lock:
+            pricing = self._pricing
+            if sku not in pricing:
+                # Try to find by name
+                item = self.get_inventory_by_name(sku)
+                if item:
+                    sku = item.get("sku")
+                else:
+                    return {"error": f"Product not found: {sku}"}
+
+            if sku not in pricing:
+                return {"error": f"Pricing not found for: {sku}"}
+
+            old_price = pricing[sku]["price"]
+            pricing[sku]["price"] = new_price
+
+            # Recalculate margin
+            cost = pricing[sku]["cost"]
+            pricing[sku]["margin"] = round((new_price - cost) / new_price * 100, 1)
+
+            pos = self._sku_pos.get(sku)
+            if pos is not None:
+                self._price[pos] = new_price
+                self._margin[pos] = pricing[sku]["margin"]
+            self._mark_dirty()
+
+            inventory = self._inventory.get(sku, _EMPTY)
+            return {
+                "sku": sku,
+                "name": inventory.get("name", "Unknown"),
+                "old_price": old_price,
+                "new_price": new_price,
+                "margin": pricing[sku]["margin"]
+            }
+
     # ==================== CUSTOMERS ====================
 
-    def get_all_customers(self) -> Dict[str, Any]:
-        """Get all customers."""
-        return self._data.get("customers", {})
+    def get_all_customers(self) -> Mapping[str, Any]:
+        """Get all customers (read-only view)."""
+        return self._customers_view
 
     def get_customer_by_id(self, customer_id: str) -> Optional[Dict[str, Any]]:
         """Get a customer by ID."""
-        return self._data.get("customers", {}).get(customer_id)
+        return self._customers.get(customer_id)
 
     def get_customer_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Find customer by name (partial match)."""
-        customers = self._data.get("customers", {})
+        customers = self._customers
         name_lower = name.lower()
-        for cust_id, customer in customers.items():
-            if name_lower in customer.get("name", "").lower():
-                return customer
+        for customer_name, cust_id in self._customer_name_index.items():
+            if name_lower in customer_name:
+                return customers[cust_id]
         return None
 
+    def match_customer(self, text_lower: str, include_contact: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Find the first customer (in customer order) whose name - or contact
+        person, if include_contact - appears in the given lowercased text.
+        """
+        matched = self._customer_matcher.scan(text_lower)
+        if not include_contact:
+            matched = {hit for hit in matched if hit[1] == "name"}
+        if not matched:
+            return None
+        cust_id = min((hit[0] for hit in matched), key=self._customer_pos.__getitem__)
+        return self._customers[cust_id]
+
     def get_customers_by_tier(self, tier: str) -> List[Dict[str, Any]]:
         """Get all customers in a tier."""
-        customers = self._data.get("customers", {})
-        return [
-            customer for customer in customers.values()
-            if customer.get("tier", "").lower() == tier.lower()
-        ]
+        customers = self._customers
+        return [customers[cust_id] for cust_id in self._by_tier.get(tier.lower(), ())]
+
+    def get_customers_by_tier_sorted(self, tier: str) -> List[Dict[str, Any]]:
+        """Get all customers in a tier, highest total spent first (memoized until the next mutation)."""
+        tier_lower = tier.lower()
+        if tier_lower not in self._by_tier:
+            return []
+        return self._cached(
+            f"tier_sorted:{tier_lower}",
+            lambda: sorted(self.get_customers_by_tier(tier_lower), key=lambda c: c["total_spent"], reverse=True),
+        )
+
+    def get_top_customer_in_tier(self, tier: str) -> Optional[Dict[str, Any]]:
+        """Get the customer with the highest total spent in a tier."""
+        customers = self.get_customers_by_tier_sorted(tier)
+        return customers[0] if customers else None
 
     def search_customers(self, query: str) -> List[Dict[str, Any]]:
         """Search customers by name, contact, or location."""
-        customers = self._data.get("customers", {})
-        query_lower = query.lower()
-        results = []
-        for customer in customers.values():
-            if (query_lower in customer.get("name", "").lower() or
-                query_lower in customer.get("contact", "").lower() or
-                query_lower in customer.get("location", "").lower()):
-                results.append(customer)
-        return results
+        customers = self._customers
+        return [customers[cust_id] for cust_id in self._customer_search.find(query.lower())]
 
     # ==================== DISCOUNTS ====================
 
     def get_discount_structure(self) -> Dict[str, Any]:
         """Get the full discount structure."""
-        return self._data.get("discounts", {})
+        return self._discounts
 
     def get_tier_discount(self, tier: str) -> int:
         """Get discount percentage for a customer tier."""
-        tier_discounts = self._data.get("discounts", {}).get("tier_discounts", {})
+        tier_discounts = self._discounts.get("tier_discounts", _EMPTY)
         return tier_discounts.get(tier, 0)
 
     def get_volume_discount(self, quantity: int) -> int:
         """Get volume discount percentage for a quantity."""
-        volume_discounts = self._data.get("discounts", {}).get("volume_discounts", {})
-        discount = 0
-        for threshold, disc in sorted(volume_discounts.items(), key=lambda x: int(x[0])):
-            if quantity >= int(threshold):
-                discount = disc
-        return discount
+        pos = bisect.bisect_right(self._volume_thresholds, quantity) - 1
+        return self._volume_discounts[pos] if pos >= 0 else 0
+
+    def get_volume_discount_tiers(self) -> List[Tuple[int, int]]:
+        """Get the volume discount brackets as (minimum quantity, discount) pairs, smallest first."""
+        return list(zip(self._volume_thresholds, self._volume_discounts))
 
     def calculate_total_discount(self, tier: str, quantity: int) -> Dict[str, Any]:
         """Calculate total discount for a customer tier and quantity."""
@@ -330,63 +766,64 @@ class DemoStore:
 
     def update_tier_discount(self, tier: str, discount: int) -> Dict[str, Any]:
         """Update discount percentage for a tier."""
-        if "discounts" not in self._data:
-            self._data["discounts"] = {"tier_discounts": {}, "volume_discounts": {}}
-        if "tier_discounts" not in self._data["discounts"]:
-            self._data["discounts"]["tier_discounts"] = {}
+        with self._lock:
+            tier_discounts = self._discounts.setdefault("tier_discounts", {})
+            old_discount = tier_discounts.get(tier, 0)
+            tier_discounts[tier] = discount
+            self._rebuild_discount_index()
+            self._mark_dirty()
 
-        old_discount = self._data["discounts"]["tier_discounts"].get(tier, 0)
-        self._data["discounts"]["tier_discounts"][tier] = discount
-        self._save_data()
-
-        return {
-            "tier": tier,
-            "old_discount": old_discount,
-            "new_discount": discount
-        }
+            return {
+                "tier": tier,
+                "old_discount": old_discount,
+                "new_discount": discount
+            }
 
     # ==================== SUMMARY METHODS ====================
 
     def get_inventory_summary(self) -> Dict[str, Any]:
-        """Get summary of inventory by category."""
-        inventory = self._data.get("inventory", {})
-
-        categories = {}
-        total_items = 0
-        total_value = 0
-        low_stock_count = 0
-
-        pricing = self._data.get("pricing", {})
-
-        for sku, item in inventory.items():
-            category = item.get("category", "Other")
-            qty = item.get("quantity", 0)
-            price = pricing.get(sku, {}).get("price", 0)
-
-            if category not in categories:
-                categories[category] = {"count": 0, "total_quantity": 0, "total_value": 0}
-
-            categories[category]["count"] += 1
-            categories[category]["total_quantity"] += qty
-            categories[category]["total_value"] += qty * price
-
-            total_items += qty
-            total_value += qty * price
+        """Get summary of inventory by category (memoized until the next mutation)."""
+        return self._cached("inventory_summary", self._compute_inventory_summary)
+
+    def _compute_inventory_summary(self) -> Dict[str, Any]:
+        inventory = self._inventory
+
+        values = list(map(operator.mul, self._qty, self._price))
+
+        num_categories = len(self._category_names)
+        counts = [0] * num_categories
+        quantities = [0] * num_categories
+        category_values = [0] * num_categories
+        for code, qty, value in zip(self._category_codes, self._qty, values):
+            counts[code] += 1
+            quantities[code] += qty
+            category_values[code] += value
+
+        categories = {
+            name: {
+                "count": counts[code],
+                "total_quantity": quantities[code],
+                "total_value": category_values[code],
+            }
+            for code, name in enumerate(self._category_names)
+        }
 
-            if item.get("status") == "low":
-                low_stock_count += 1
+        low_stock_count = sum(1 for item in inventory.values() if item.get("status") == "low")
 
         return {
             "total_products": len(inventory),
-            "total_items": total_items,
-            "total_value": round(total_value, 2),
+            "total_items": sum(self._qty),
+            "total_value": round(sum(values), 2),
             "low_stock_count": low_stock_count,
             "by_category": categories
         }
 
     def get_customer_summary(self) -> Dict[str, Any]:
-        """Get summary of customers by tier."""
-        customers = self._data.get("customers", {})
+        """Get summary of customers by tier (memoized until the next mutation)."""
+        return self._cached("customer_summary", self._compute_customer_summary)
+
+    def _compute_customer_summary(self) -> Dict[str, Any]:
+        customers = self._customers
 
         tiers = {}
         total_spent = 0
@@ -408,6 +845,21 @@ class DemoStore:
             "by_tier": tiers
         }
 
+    def get_sales_dashboard(self) -> Dict[str, Any]:
+        """Get the headline figures for the sales overview (memoized until the next mutation)."""
+        return self._cached("sales_dashboard", self._compute_sales_dashboard)
+
+    def _compute_sales_dashboard(self) -> Dict[str, Any]:
+        customer_summary = self.get_customer_summary()
+        return {
+            "total_customers": customer_summary["total_customers"],
+            "total_revenue": customer_summary["total_revenue"],
+            "inventory_value": self.get_inventory_summary()["total_value"],
+            "top_customer": self.get_top_customer_in_tier("Platinum"),
+            "max_tier_discount": self._max_tier_discount,
+            "max_volume_discount": self._max_volume_discount,
+        }
+
 
 # Global instance
 demo_store = DemoStore()
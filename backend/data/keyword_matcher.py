@@ -0,0 +1,79 @@
+"""
+Keyword Matcher - Finds which of many keywords occur in a piece of text.
+
+Used for keyword routing, scope detection and intent matching, which all
+need the same answer as `any(kw in text for kw in keywords)` over large
+keyword lists, but on every request.
+"""
+
+import re
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Set, Tuple
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex matching the longest of the keywords at a position.
+
+    The keywords are laid out as a trie (shared prefixes, one branch per next
+    character), so the regex engine rejects most positions on their first
+    character instead of trying every keyword in turn.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of keyword
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional: prefer continuing to a longer keyword over ending here
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Substring matcher over a fixed set of keywords, each tagged with a payload.
+
+    All keywords are compiled into one trie-shaped regex so the text is scanned
+    once in C. The pattern is a lookahead, so matches may overlap, and at each
+    position it reports the longest keyword that starts there. Any other
+    keyword starting at that position is a prefix of that one, so each keyword
+    carries the payloads of its keyword prefixes too. Together this gives
+    exactly the `kw in text` semantics.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Hashable]]):
+        payloads: Dict[str, Set[Hashable]] = {}
+        for keyword, payload in entries:
+            if keyword:
+                payloads.setdefault(keyword, set()).add(payload)
+
+        # keyword -> payloads of every keyword it starts with (itself included)
+        self._closure: Dict[str, FrozenSet[Hashable]] = {}
+        for keyword in payloads:
+            hits: Set[Hashable] = set()
+            for other, other_payloads in payloads.items():
+                if keyword.startswith(other):
+                    hits |= other_payloads
+            self._closure[keyword] = frozenset(hits)
+
+        self._pattern = None
+        if payloads:
+            self._pattern = re.compile(f"(?=({_trie_pattern(payloads)}))")
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Get the payloads of every keyword contained in text."""
+        if self._pattern is None:
+            return set()
+        closure = self._closure
+        found: Set[Hashable] = set()
+        for keyword in set(self._pattern.findall(text)):
+            found |= closure[keyword]
+        return found
+
@@ -13,19 +13,23 @@ Key feature for demo: Shows which agents are accessible based on user's
 group membership, with clear success/denied visualization.
 """
 
-from typing import Dict, Any, List, Optional, TypedDict
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Set, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
+from collections import OrderedDict
+import asyncio
+import hashlib
 import logging
-import json
+import re
 
 from auth.multi_agent_auth import (
     get_multi_agent_exchange,
     AGENT_SALES, AGENT_INVENTORY, AGENT_CUSTOMER, AGENT_PRICING
 )
 from auth.agent_config import get_agent_config, DEMO_AGENTS
-from data.demo_store import demo_store
+from data.demo_store import demo_store, STATUS_ICON, TIER_EMOJI
+from data.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,9 @@ class WorkflowState(TypedDict):
     messages: List[Any]
     user_message: str
     conversation_context: str  # Previous conversation for context-aware routing
+    # Lowercased once per turn for the keyword checks in every node/handler
+    message_lower: str
+    full_context_lower: str  # conversation_context + message
     user_info: Dict[str, Any]
     user_token: str
 
@@ -53,29 +60,30 @@ class WorkflowState(TypedDict):
     final_response: Optional[str]
 
 
-# Agent type to keywords mapping for fallback routing
+# Agent type to keywords mapping for fallback routing (matched as substrings,
+# see _ROUTING_MATCHER)
 # NOTE: These must include both read AND write operation keywords for proper routing
 AGENT_KEYWORDS = {
-    AGENT_SALES: [
+    AGENT_SALES: frozenset({
         "order", "quote", "deal", "sale", "revenue", "pipeline", "opportunity",
         "proposal", "estimate", "fulfill", "create order", "place order",
         "ship", "deliver"
-    ],
-    AGENT_INVENTORY: [
+    }),
+    AGENT_INVENTORY: frozenset({
         "stock", "inventory", "product", "warehouse", "supply", "available", "in stock",
         "add", "update", "increase", "decrease", "adjust", "restock", "replenish",
         "reduce", "remove", "alert", "notify", "reorder", "low stock",
         "basketball", "tennis", "racket", "uniform", "equipment"
-    ],
-    AGENT_CUSTOMER: [
+    }),
+    AGENT_CUSTOMER: frozenset({
         "customer", "account", "client", "contact", "tier", "loyalty", "history",
         "lookup", "find", "search", "purchased", "transactions"
-    ],
-    AGENT_PRICING: [
+    }),
+    AGENT_PRICING: frozenset({
         "price", "discount", "margin", "cost", "profit", "bulk", "wholesale", "retail",
         "markup", "profitability", "volume", "special price",
         "reduce", "cut", "lower", "mark down", "mark up"
-    ],
+    }),
 }
 
 # Scope definitions for each MCP - maps operation type to required scope
@@ -84,73 +92,449 @@ SCOPE_DEFINITIONS = {
     AGENT_INVENTORY: {
         "read": {
             "scope": "inventory:read",
-            "keywords": ["what", "show", "list", "check", "available", "in stock", "how many", "do we have", "stock level"],
+            "keywords": frozenset({"what", "show", "list", "check", "available", "in stock", "how many", "do we have", "stock level"}),
             "description": "View inventory levels"
         },
         "write": {
             "scope": "inventory:write",
-            "keywords": ["add", "update", "change", "modify", "increase", "decrease", "set", "put", "remove", "delete", "adjust"],
+            "keywords": frozenset({"add", "update", "change", "modify", "increase", "decrease", "set", "put", "remove", "delete", "adjust"}),
             "description": "Modify inventory"
         },
         "alert": {
             "scope": "inventory:alert",
-            "keywords": ["alert", "notify", "reorder", "low stock", "warning"],
+            "keywords": frozenset({"alert", "notify", "reorder", "low stock", "warning"}),
             "description": "Inventory alerts"
         },
     },
     AGENT_PRICING: {
         "read": {
             "scope": "pricing:read",
-            "keywords": ["price", "cost", "how much", "what's the price", "pricing"],
+            "keywords": frozenset({"price", "cost", "how much", "what's the price", "pricing"}),
             "description": "View prices"
         },
         "margin": {
             "scope": "pricing:margin",
-            "keywords": ["margin", "profit", "markup", "profitability", "cost breakdown"],
+            "keywords": frozenset({"margin", "profit", "markup", "profitability", "cost breakdown"}),
             "description": "View profit margins"
         },
         "discount": {
             "scope": "pricing:discount",
-            "keywords": ["discount", "bulk pricing", "wholesale", "deal", "special price", "volume"],
+            "keywords": frozenset({"discount", "bulk pricing", "wholesale", "deal", "special price", "volume"}),
             "description": "View/apply discounts"
         },
     },
     AGENT_CUSTOMER: {
         "read": {
             "scope": "customer:read",
-            "keywords": ["who", "customer", "account", "client", "contact"],
+            "keywords": frozenset({"who", "customer", "account", "client", "contact"}),
             "description": "View customer info"
         },
         "lookup": {
             "scope": "customer:lookup",
-            "keywords": ["lookup", "find", "search", "look up"],
+            "keywords": frozenset({"lookup", "find", "search", "look up"}),
             "description": "Search customers"
         },
         "history": {
             "scope": "customer:history",
-            "keywords": ["history", "orders", "purchased", "past", "previous", "transactions"],
+            "keywords": frozenset({"history", "orders", "purchased", "past", "previous", "transactions"}),
             "description": "View purchase history"
         },
     },
     AGENT_SALES: {
         "read": {
             "scope": "sales:read",
-            "keywords": ["orders", "sales", "revenue", "pipeline", "show orders"],
+            "keywords": frozenset({"orders", "sales", "revenue", "pipeline", "show orders"}),
             "description": "View sales data"
         },
         "quote": {
             "scope": "sales:quote",
-            "keywords": ["quote", "proposal", "estimate", "quotation"],
+            "keywords": frozenset({"quote", "proposal", "estimate", "quotation"}),
             "description": "Create quotes"
         },
         "order": {
             "scope": "sales:order",
-            "keywords": ["create order", "place order", "new order", "fulfill", "submit order"],
+            "keywords": frozenset({"create order", "place order", "new order", "fulfill", "submit order"}),
             "description": "Create orders"
         },
     },
 }
 
+# Every routing and scope keyword compiled once, so keyword fallback routing
+# scans the message a single time. Hits are agent types ("inventory") from
+# AGENT_KEYWORDS and scopes ("inventory:write") from SCOPE_DEFINITIONS.
+_ROUTING_MATCHER = KeywordMatcher(
+    [
+        (keyword, agent_type)
+        for agent_type, keywords in AGENT_KEYWORDS.items()
+        for keyword in keywords
+    ] + [
+        (keyword, op_config["scope"])
+        for operations in SCOPE_DEFINITIONS.values()
+        for op_config in operations.values()
+        for keyword in op_config["keywords"]
+    ]
+)
+# Each agent's scopes in SCOPE_DEFINITIONS order
+_AGENT_SCOPES = {
+    agent_type: tuple(op_config["scope"] for op_config in operations.values())
+    for agent_type, operations in SCOPE_DEFINITIONS.items()
+}
+
+# Scopes beyond plain reads - any keyword hit for these leaves routing to the LLM
+_NON_READ_SCOPES = frozenset(
+    scope for scopes in _AGENT_SCOPES.values() for scope in scopes if not scope.endswith(":read")
+)
+
+# Structured routing output: the router LLM is forced to call this tool, with
+# one {needed, scopes} entry per agent (scopes limited to that agent's own)
+ROUTING_TOOL = {
+    "name": "select_agents",
+    "description": "Select the agents needed for the user's request and the scopes each one requires.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            agent_type: {
+                "type": "object",
+                "properties": {
+                    "needed": {"type": "boolean"},
+                    "scopes": {"type": "array", "items": {"type": "string", "enum": list(scopes)}},
+                },
+                "required": ["needed", "scopes"],
+            }
+            for agent_type, scopes in _AGENT_SCOPES.items()
+        },
+        "required": list(_AGENT_SCOPES),
+    },
+}
+
+# Tag on the response LLM's runs, used to find its tokens when streaming
+RESPONSE_LLM_TAG = "response_llm"
+
+
+def _chunk_text(content: Any) -> str:
+    """Get the text of a streamed message chunk (a string or content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+
+# Static part of the routing prompt (the request itself is appended per call)
+ROUTER_PROMPT = """Analyze this user request and determine:
+1. Which AI agents should handle it
+2. What specific operations/scopes are needed for each agent
+
+Available agents and their scopes:
+1. SALES:
+   - sales:read - View orders, sales data, revenue (read-only queries)
+   - sales:quote - Create quotes/proposals
+   - sales:order - Create/modify orders
+
+2. INVENTORY:
+   - inventory:read - View stock levels, product availability (read-only queries like "what do we have", "check stock")
+   - inventory:write - Add/update/modify inventory (write operations like "add 5000 basketballs", "update stock", "increase stock")
+   - inventory:alert - Manage inventory alerts
+
+3. CUSTOMER:
+   - customer:read - View customer information
+   - customer:lookup - Search/find customers
+   - customer:history - View purchase history
+
+4. PRICING:
+   - pricing:read - View prices (basic price queries)
+   - pricing:margin - View profit margins (margin/profit queries)
+   - pricing:discount - View/apply discounts (bulk/discount queries)
+
+Report for every agent whether it is needed and which scopes it requires.
+
+IMPORTANT: Choose scopes based on the operation type:
+- READ operations (view, show, list, check, what, how many) -> use :read scopes
+- WRITE operations (add, update, modify, change, set, put, increase, decrease) -> use :write scopes
+- For margin/profit queries -> use pricing:margin
+- For discount/bulk queries -> use pricing:discount
+- If the user says "yes", "do it", "go ahead", "confirm" - look at conversation history to determine the operation
+
+Call the select_agents tool with your decision."""
+
+# Inventory handler intents. These lists are short enough that C-level
+# substring checks beat a compiled matcher scan, so they stay plain tuples;
+# product keywords are tried in order
+_INVENTORY_WRITE_KEYWORDS = ("increase", "decrease", "update", "add", "set", "adjust", "reduce", "remove")
+_INVENTORY_ALERT_KEYWORDS = ("low stock", "alert", "reorder", "warning")
+_INVENTORY_PRODUCT_KEYWORDS = ("basketball", "hoop", "net", "uniform", "jersey", "shoe", "training", "backboard", "rim")
+# Direction of an inventory write - decrease is checked first
+_INVENTORY_DECREASE_KEYWORDS = ("decrease", "reduce", "remove", "subtract")
+_INVENTORY_INCREASE_KEYWORDS = ("increase", "add", "restock", "replenish")
+# Pricing handler intents, kept as plain tuples like the inventory ones
+_PRICING_DISCOUNT_KEYWORDS = ("discount", "calculate", "total")
+_PRICING_MARGIN_KEYWORDS = ("margin", "profit")
+# Product keyword -> pricing category, checked in this order
+_PRICING_KEYWORD_CATEGORY = {
+    "basketball": "Basketballs",
+    "hoop": "Hoops & Backboards",
+    "net": "Nets & Accessories",
+    "uniform": "Uniforms & Apparel",
+    "jersey": "Uniforms & Apparel",
+    "shoe": "Footwear",
+    "training": "Training Equipment",
+}
+
+# Lowercased tier name -> tier, in display order
+_TIER_KEYWORDS = {tier.lower(): tier for tier in TIER_EMOJI}
+
+# Wrapped around the conversation history, when there is one, ahead of the request
+ROUTER_CONTEXT_HEADER = """
+CONVERSATION HISTORY (for context):
+"""
+ROUTER_CONTEXT_FOOTER = """
+
+NOTE: The user's current message may reference the conversation above.
+For example, "Yes", "Do it", "Go ahead" likely refers to the previous assistant suggestion.
+Consider this context when determining which agents and scopes are needed.
+
+"""
+
+# Common product references used to identify the target of inventory writes
+PRODUCT_MAPPINGS = {
+    "pro arena": "Pro Arena Hoop System",
+    "arena hoop": "Pro Arena Hoop System",
+    "pro game basketball": "Pro Game Basketball",
+    "pro game": "Pro Game Basketball",
+    "composite basketball": "Pro Composite Basketball",
+    "pro composite": "Pro Composite Basketball",
+    "women's basketball": "Women's Official Basketball",
+    "women's official": "Women's Official Basketball",
+    "youth size 5": "Youth Size 5 Basketball",
+    "youth size 4": "Youth Size 4 Basketball",
+    "indoor basketball": "Indoor Premium Basketball",
+    "indoor premium": "Indoor Premium Basketball",
+    "outdoor basketball": "Outdoor Rubber Basketball",
+    "outdoor rubber": "Outdoor Rubber Basketball",
+    "training basketball": "Training Heavy Basketball",
+    "training heavy": "Training Heavy Basketball",
+    "portable hoop": "Portable Hoop System",
+    "wall mount": "Wall-Mount Hoop",
+    "wall-mount": "Wall-Mount Hoop",
+    "youth hoop": "Youth Adjustable Hoop",
+    "breakaway rim": "Breakaway Rim Pro",
+    "backboard": "Replacement Backboard 72\"",
+    "replacement backboard": "Replacement Backboard 72\"",
+    "competition net": "Pro Competition Net (White)",
+    "chain net": "Heavy Duty Chain Net",
+    "ball pump": "Ball Pump Pro",
+    "ball bag": "Ball Bag (holds 10)",
+    "ball rack": "Ball Rack (holds 16)",
+    "game jersey": "Pro Game Jersey",
+    "pro jersey": "Pro Game Jersey",
+    "game shorts": "Pro Game Shorts",
+    "pro shorts": "Pro Game Shorts",
+    "practice jersey": "Reversible Practice Jersey",
+    "reversible jersey": "Reversible Practice Jersey",
+    "warm-up jacket": "Warm-Up Jacket",
+    "warmup jacket": "Warm-Up Jacket",
+    "warm-up pants": "Warm-Up Pants",
+    "warmup pants": "Warm-Up Pants",
+    "shooting shirt": "Shooting Shirt",
+    "team hoodie": "Team Hoodie",
+    "hoodie": "Team Hoodie",
+    "practice shorts": "Practice Shorts",
+    "agility cones": "Agility Cones (set of 20)",
+    "cones": "Agility Cones (set of 20)",
+    "agility ladder": "Agility Ladder",
+    "ladder": "Agility Ladder",
+    "dribble goggles": "Dribble Goggles",
+    "goggles": "Dribble Goggles",
+    "resistance bands": "Resistance Bands Set",
+    "shot arc": "Shot Arc Trainer",
+    "arc trainer": "Shot Arc Trainer",
+    "slide trainer": "Defensive Slide Trainer",
+    "defensive slide": "Defensive Slide Trainer",
+    "court shoe": "Pro Court Basketball Shoe",
+    "basketball shoe": "Pro Court Basketball Shoe",
+    "youth shoe": "Youth Basketball Shoe",
+    "training shoe": "Training Shoe",
+    "referee shoe": "Referee Shoe",
+}
+
+# Matches report mapping positions, so the earliest matching mapping can win
+_PRODUCT_NAMES = list(PRODUCT_MAPPINGS.values())
+_PRODUCT_MATCHER = KeywordMatcher((pattern, i) for i, pattern in enumerate(PRODUCT_MAPPINGS))
+
+# Exchange error messages that indicate a policy denial
+_POLICY_DENIAL_RE = re.compile(r"policy|denied|unauthorized|forbidden", re.IGNORECASE)
+
+# Quantity in a request, e.g. "500 units" or "10%"
+_QTY_RE = re.compile(r'(\d+)\s*(?:units?|%)?')
+
+# LLM routing decisions, keyed on a hash of the message and recent context
+ROUTE_CACHE_SIZE = 256
+ROUTE_CACHE_CONTEXT_CHARS = 2000
+_route_cache: "OrderedDict[str, Tuple[List[str], Dict[str, List[str]]]]" = OrderedDict()
+# LLM routing calls in progress, so concurrent identical requests share one
+_inflight_routes: Dict[str, "asyncio.Future"] = {}
+
+
+def _route_cache_key(message: str, conversation_context: str) -> str:
+    """Hash a request and the tail of its conversation context."""
+    text = message + "\n" + conversation_context[-ROUTE_CACHE_CONTEXT_CHARS:]
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _copy_route(agents: List[str], agent_scopes: Dict[str, List[str]]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Copy a routing decision so shared ones can't be mutated by callers."""
+    return list(agents), {agent: list(scopes) for agent, scopes in agent_scopes.items()}
+
+
+def _get_cached_route(key: str) -> Optional[Tuple[List[str], Dict[str, List[str]]]]:
+    """Get a copy of a cached routing decision, if any."""
+    cached = _route_cache.get(key)
+    if cached is None:
+        return None
+    _route_cache.move_to_end(key)
+    return _copy_route(*cached)
+
+
+def _store_route(key: str, agents: List[str], agent_scopes: Dict[str, List[str]]) -> None:
+    """Cache a routing decision, evicting the least recently used one if full."""
+    _route_cache[key] = _copy_route(agents, agent_scopes)
+    _route_cache.move_to_end(key)
+    while len(_route_cache) > ROUTE_CACHE_SIZE:
+        _route_cache.popitem(last=False)
+
+# Agent invocation limits: at most this many agents run at once across all
+# requests, and each gets this long to respond
+AGENT_MAX_CONCURRENCY = 8
+AGENT_TIMEOUT_SECONDS = 15.0
+_agent_semaphore = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+
+
+def _release_agent_slot(work: "asyncio.Future[str]") -> None:
+    """Free an agent's concurrency slot once its handler has finished."""
+    _agent_semaphore.release()
+    # Retrieve the outcome, so a handler that fails after its caller timed out
+    # isn't logged as an unretrieved exception
+    if not work.cancelled():
+        work.exception()
+
+
+# Rendered text that depends only on store data: key -> (store version, text)
+_rendered_text: Dict[str, Tuple[int, str]] = {}
+
+# Shared LLM clients - created on first use (after the environment is loaded)
+# and reused by every request, so they share one HTTP connection pool
+_router_llm: Optional[ChatAnthropic] = None
+_routing_llm: Optional[Any] = None
+_response_llm: Optional[ChatAnthropic] = None
+
+
+def get_router_llm() -> ChatAnthropic:
+    """Get or create the router LLM (fast model for routing decisions)."""
+    global _router_llm
+    if _router_llm is None:
+        # Routing is a small classification task - a Haiku-class model is
+        # plenty, and the tool-call answer fits well within 200 tokens
+        _router_llm = ChatAnthropic(
+            model="claude-haiku-4-5-20251001",
+            temperature=0,
+            max_tokens=200,
+        )
+    return _router_llm
+
+
+def get_routing_llm() -> Any:
+    """Get or create the router LLM bound to the forced select_agents tool call."""
+    global _routing_llm
+    if _routing_llm is None:
+        _routing_llm = get_router_llm().bind_tools(
+            [ROUTING_TOOL],
+            tool_choice={"type": "tool", "name": ROUTING_TOOL["name"]}
+        )
+    return _routing_llm
+
+
+def get_response_llm() -> ChatAnthropic:
+    """
+    Get or create the response LLM (for combining results).
+
+    Tagged so stream() can pick its tokens out of the workflow's event stream.
+    """
+    global _response_llm
+    if _response_llm is None:
+        _response_llm = ChatAnthropic(
+            model="claude-sonnet-4-20250514",
+            temperature=0.7,
+            tags=[RESPONSE_LLM_TAG],
+        )
+    return _response_llm
+
+
+def _cached_render(key: str, render: Callable[[], str]) -> str:
+    """Return render()'s text for key, re-rendering only after the store changes."""
+    version = demo_store.version
+    cached = _rendered_text.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    text = render()
+    _rendered_text[key] = (version, text)
+    return text
+
+
+def _render_inventory_summary() -> str:
+    """Render the default inventory answer."""
+    summary = demo_store.get_inventory_summary()
+    lines = [
+        "**ProGear Basketball - Inventory Summary**\n",
+        f"Total Products: {summary['total_products']}",
+        f"Total Items in Stock: {summary['total_items']:,}",
+        f"Total Inventory Value: ${summary['total_value']:,.2f}",
+    ]
+    if summary['low_stock_count'] > 0:
+        lines.append(f"⚠️ Low Stock Alerts: {summary['low_stock_count']}")
+
+    lines.append("\n**By Category:**")
+    for category, data in summary['by_category'].items():
+        lines.append(f"- {category}: {data['total_quantity']:,} units")
+
+    return "\n".join(lines)
+
+
+def _render_sales_overview() -> str:
+    """Render the sales answer."""
+    dashboard = demo_store.get_sales_dashboard()
+    lines = [
+        "**ProGear Basketball - Sales Overview**\n",
+        f"Total Customer Base: {dashboard['total_customers']} customers",
+        f"Total Revenue: ${dashboard['total_revenue']:,}",
+        f"Inventory Value: ${dashboard['inventory_value']:,.2f}",
+    ]
+
+    # Top customer for orders context
+    top_customer = dashboard['top_customer']
+    if top_customer:
+        lines.append(f"\n**Top Customer:** {top_customer['name']} (${top_customer['total_spent']:,})")
+
+    # Discount info for context
+    lines.append("\n**Available Discounts:**")
+    lines.append(f"- Tier-based: up to {dashboard['max_tier_discount']}%")
+    lines.append(f"- Volume-based: up to {dashboard['max_volume_discount']}%")
+
+    return "\n".join(lines)
+
+
+def _render_discount_structure() -> str:
+    """Render the default pricing answer."""
+    discounts = demo_store.get_discount_structure()
+    return (
+        "**ProGear Basketball - Pricing & Discounts**\n\n"
+        "**Tier Discounts:**\n"
+        + "\n".join(f"- {tier}: {disc}%" for tier, disc in discounts.get('tier_discounts', {}).items())
+        + "\n\n**Volume Discounts:**\n"
+        + "\n".join(f"- {qty}+ units: {disc}%" for qty, disc in demo_store.get_volume_discount_tiers())
+        + "\n\n*Discounts are combinable (e.g., Platinum + 500 units = 25% off)*"
+    )
+
 
 class Orchestrator:
     """
@@ -174,17 +558,10 @@ class Orchestrator:
         # Get multi-agent token exchange manager
         self.token_exchange = get_multi_agent_exchange()
 
-        # Initialize router LLM (fast model for routing decisions)
-        self.router_llm = ChatAnthropic(
-            model="claude-sonnet-4-20250514",
-            temperature=0,
-        )
-
-        # Initialize response LLM (for combining results)
-        self.response_llm = ChatAnthropic(
-            model="claude-sonnet-4-20250514",
-            temperature=0.7,
-        )
+        # Shared router / response LLMs
+        self.router_llm = get_router_llm()
+        self.routing_llm = get_routing_llm()
+        self.response_llm = get_response_llm()
 
         # Build the workflow
         self.workflow = self._build_workflow()
@@ -212,7 +589,9 @@ class Orchestrator:
         """
         Determine which agents to invoke and what scopes are needed.
 
-        Uses LLM-powered routing with keyword fallback.
+        Uses LLM-powered routing with keyword fallback. Unambiguous read-only
+        requests with no prior conversation are routed from keywords alone,
+        skipping the LLM.
         CRITICAL: Detects intent to determine specific scopes needed.
         """
         message = state["user_message"]
@@ -224,87 +603,33 @@ class Orchestrator:
             "status": "processing"
         })
 
-        # Build context section if we have conversation history
-        context_section = ""
-        if conversation_context:
-            context_section = f"""
-CONVERSATION HISTORY (for context):
-{conversation_context}
-
-NOTE: The user's current message may reference the conversation above.
-For example, "Yes", "Do it", "Go ahead" likely refers to the previous assistant suggestion.
-Consider this context when determining which agents and scopes are needed.
-
-"""
-
-        # Use LLM to determine which agents are relevant AND what operations are needed
-        try:
-            routing_prompt = f"""Analyze this user request and determine:
-1. Which AI agents should handle it
-2. What specific operations/scopes are needed for each agent
-
-Available agents and their scopes:
-1. SALES:
-   - sales:read - View orders, sales data, revenue (read-only queries)
-   - sales:quote - Create quotes/proposals
-   - sales:order - Create/modify orders
-
-2. INVENTORY:
-   - inventory:read - View stock levels, product availability (read-only queries like "what do we have", "check stock")
-   - inventory:write - Add/update/modify inventory (write operations like "add 5000 basketballs", "update stock", "increase stock")
-   - inventory:alert - Manage inventory alerts
-
-3. CUSTOMER:
-   - customer:read - View customer information
-   - customer:lookup - Search/find customers
-   - customer:history - View purchase history
-
-4. PRICING:
-   - pricing:read - View prices (basic price queries)
-   - pricing:margin - View profit margins (margin/profit queries)
-   - pricing:discount - View/apply discounts (bulk/discount queries)
-{context_section}
-CURRENT USER REQUEST: "{message}"
-
-Return a JSON object with agents and their required scopes:
-{{
-  "sales": {{"needed": true/false, "scopes": ["sales:read"]}},
-  "inventory": {{"needed": true/false, "scopes": ["inventory:read"]}},
-  "customer": {{"needed": true/false, "scopes": ["customer:read"]}},
-  "pricing": {{"needed": true/false, "scopes": ["pricing:read"]}}
-}}
-
-IMPORTANT: Choose scopes based on the operation type:
-- READ operations (view, show, list, check, what, how many) -> use :read scopes
-- WRITE operations (add, update, modify, change, set, put, increase, decrease) -> use :write scopes
-- For margin/profit queries -> use pricing:margin
-- For discount/bulk queries -> use pricing:discount
-- If the user says "yes", "do it", "go ahead", "confirm" - look at conversation history to determine the operation
-
-Return ONLY the JSON object, no other text."""
-
-            response = await self.router_llm.ainvoke([HumanMessage(content=routing_prompt)])
-            routing_json = json.loads(response.content)
-
-            agents = []
-            agent_scopes = {}
-
-            for agent_type, config in [
-                (AGENT_SALES, routing_json.get("sales", {})),
-                (AGENT_INVENTORY, routing_json.get("inventory", {})),
-                (AGENT_CUSTOMER, routing_json.get("customer", {})),
-                (AGENT_PRICING, routing_json.get("pricing", {}))
-            ]:
-                if config.get("needed"):
-                    agents.append(agent_type)
-                    agent_scopes[agent_type] = config.get("scopes", [f"{agent_type}:read"])
-
-            logger.info(f"LLM routing decision: agents={agents}, scopes={agent_scopes}")
-
-        except Exception as e:
-            logger.warning(f"LLM routing failed, using keyword fallback: {e}")
-            agents = self._keyword_routing(message)
-            agent_scopes = self._detect_scopes_from_keywords(message, agents)
+        matched = _ROUTING_MATCHER.scan(state["message_lower"])
+        # Follow-ups ("update it", "what about Gold?") lean on earlier turns the
+        # keyword scan can't see, so only a standalone message takes the fast path
+        fast_route = None if conversation_context else self._keyword_fast_path(matched)
+        if fast_route is not None:
+            agents, agent_scopes = fast_route
+            routing_path = "keyword-fastpath"
+        else:
+            # Identical requests in the same conversation route the same way - reuse
+            # the LLM decision instead of another round-trip
+            cache_key = _route_cache_key(message, conversation_context)
+            cached_route = _get_cached_route(cache_key)
+            if cached_route is not None:
+                agents, agent_scopes = cached_route
+                routing_path = "cache"
+            else:
+                try:
+                    agents, agent_scopes = await self._coalesced_llm_routing(cache_key, message, conversation_context)
+                    _store_route(cache_key, agents, agent_scopes)
+                    routing_path = "llm"
+                except Exception as e:
+                    logger.warning(f"LLM routing failed, using keyword fallback: {e}")
+                    agents = self._keyword_routing(message, matched)
+                    agent_scopes = self._detect_scopes_from_keywords(message, agents, matched)
+                    routing_path = "keyword-fallback"
+
+        logger.info(f"Routing decision: routing_path={routing_path}, agents={agents}, scopes={agent_scopes}")
 
         # Default to at least one agent
         if not agents:
@@ -326,36 +651,91 @@ Return ONLY the JSON object, no other text."""
 
         return state
 
-    def _detect_scopes_from_keywords(self, message: str, agents: List[str]) -> Dict[str, List[str]]:
-        """Detect required scopes based on keywords in the message."""
-        message_lower = message.lower()
-        agent_scopes = {}
-
-        for agent_type in agents:
-            if agent_type in SCOPE_DEFINITIONS:
-                scopes = []
-                for op_type, op_config in SCOPE_DEFINITIONS[agent_type].items():
-                    if any(kw in message_lower for kw in op_config["keywords"]):
-                        scopes.append(op_config["scope"])
+    def _keyword_fast_path(self, matched: Set[str]) -> Optional[Tuple[List[str], Dict[str, List[str]]]]:
+        """
+        Route from keyword matches alone when they are unambiguous.
 
-                # Default to read scope if no specific scope detected
-                if not scopes:
-                    scopes = [f"{agent_type}:read"]
+        Applies when exactly one agent's keywords match, that agent's read
+        scope keywords match, and no keyword for any non-read scope does.
+        Returns None when the LLM should decide.
+        """
+        agents = [agent_type for agent_type in AGENT_KEYWORDS if agent_type in matched]
+        if len(agents) != 1 or not matched.isdisjoint(_NON_READ_SCOPES):
+            return None
+        read_scope = f"{agents[0]}:read"
+        if read_scope not in matched:
+            return None
+        return agents, {agents[0]: [read_scope]}
+
+    async def _coalesced_llm_routing(
+        self, cache_key: str, message: str, conversation_context: str
+    ) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Run LLM routing, sharing one call between concurrent identical requests."""
+        task = _inflight_routes.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._llm_routing(message, conversation_context))
+            _inflight_routes[cache_key] = task
+            task.add_done_callback(lambda _: _inflight_routes.pop(cache_key, None))
+        # Shield so one caller being cancelled doesn't cancel the shared call
+        return _copy_route(*await asyncio.shield(task))
+
+    async def _llm_routing(
+        self, message: str, conversation_context: str
+    ) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Ask the router LLM which agents and scopes the request needs."""
+        # Build context section if we have conversation history
+        request_text = f'CURRENT USER REQUEST: "{message}"'
+        if conversation_context:
+            request_text = ROUTER_CONTEXT_HEADER + conversation_context + ROUTER_CONTEXT_FOOTER + request_text
 
-                agent_scopes[agent_type] = scopes
-            else:
-                agent_scopes[agent_type] = [f"{agent_type}:read"]
+        # Static instructions first, marked as a cache breakpoint so repeated
+        # routing calls reuse the prefix; only the request part varies
+        routing_content = [
+            {"type": "text", "text": ROUTER_PROMPT, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": request_text},
+        ]
 
-        return agent_scopes
+        # Forced tool call - the arguments arrive already parsed and schema-shaped
+        response = await self.routing_llm.ainvoke([HumanMessage(content=routing_content)])
+        routing_json = response.tool_calls[0]["args"]
 
-    def _keyword_routing(self, message: str) -> List[str]:
-        """Fallback keyword-based routing."""
-        message_lower = message.lower()
         agents = []
+        agent_scopes = {}
 
-        for agent_type, keywords in AGENT_KEYWORDS.items():
-            if any(keyword in message_lower for keyword in keywords):
+        for agent_type, config in [
+            (AGENT_SALES, routing_json.get("sales", {})),
+            (AGENT_INVENTORY, routing_json.get("inventory", {})),
+            (AGENT_CUSTOMER, routing_json.get("customer", {})),
+            (AGENT_PRICING, routing_json.get("pricing", {}))
+        ]:
+            if config.get("needed"):
                 agents.append(agent_type)
+                agent_scopes[agent_type] = config.get("scopes", [f"{agent_type}:read"])
+
+        logger.info(f"LLM routing decision: agents={agents}, scopes={agent_scopes}")
+
+        return agents, agent_scopes
+
+    def _detect_scopes_from_keywords(
+        self, message: str, agents: List[str], matched: Optional[Set[str]] = None
+    ) -> Dict[str, List[str]]:
+        """Detect required scopes based on keywords in the message (or its precomputed matcher hits)."""
+        if matched is None:
+            matched = _ROUTING_MATCHER.scan(message.lower())
+        agent_scopes = {}
+
+        for agent_type in agents:
+            scopes = [scope for scope in _AGENT_SCOPES.get(agent_type, ()) if scope in matched]
+            # Default to read scope if no specific scope detected
+            agent_scopes[agent_type] = scopes or [f"{agent_type}:read"]
+
+        return agent_scopes
+
+    def _keyword_routing(self, message: str, matched: Optional[Set[str]] = None) -> List[str]:
+        """Fallback keyword-based routing (optionally from precomputed matcher hits)."""
+        if matched is None:
+            matched = _ROUTING_MATCHER.scan(message.lower())
+        agents = [agent_type for agent_type in AGENT_KEYWORDS if agent_type in matched]
 
         return agents if agents else [AGENT_SALES]
 
@@ -392,10 +772,9 @@ Return ONLY the JSON object, no other text."""
 
             # Detect if this is a policy denial even if not explicitly marked
             is_access_denied = result.get("access_denied", False)
-            error_msg = result.get("error", "").lower()
+            error_msg = result.get("error", "")
             if not is_access_denied and error_msg:
-                policy_keywords = ["policy", "denied", "unauthorized", "forbidden"]
-                is_access_denied = any(kw in error_msg for kw in policy_keywords)
+                is_access_denied = _POLICY_DENIAL_RE.search(error_msg) is not None
 
             exchange_record = {
                 "agent": agent_type,
@@ -454,23 +833,43 @@ Return ONLY the JSON object, no other text."""
             "status": "processing"
         })
 
-        # For each agent with access, simulate processing
+        # Run every agent with access concurrently (bounded, with a timeout each)
         # In a full implementation, this would call MCP tools
+        message_lower = state["message_lower"]
+        full_context_lower = state["full_context_lower"]
+        runnable = [
+            agent_type for agent_type, exchange_result in agent_results.items()
+            if exchange_result["success"] and not exchange_result.get("access_denied")
+        ]
+        outcomes = await asyncio.gather(*(
+            self._invoke_agent_bounded(
+                agent_type, message_lower, agent_results[agent_type], full_context_lower
+            )
+            for agent_type in runnable
+        ))
+        agent_errors = {}
+        for agent_type, (agent_response, error) in zip(runnable, outcomes):
+            if error is None:
+                agent_results[agent_type]["response"] = agent_response
+            else:
+                agent_errors[agent_type] = error
+
+        # Record the flow in routing order
         for agent_type, exchange_result in agent_results.items():
             # Use display_name for Agent Flow card
             display_name = exchange_result["agent_info"].get("display_name", exchange_result["agent_info"]["name"])
             requested_scopes = exchange_result.get("requested_scopes", [])
 
-            if exchange_result["success"] and not exchange_result.get("access_denied"):
-                # Agent has access - process the request
-                agent_response = await self._invoke_agent(
-                    agent_type,
-                    state["user_message"],
-                    exchange_result,
-                    state.get("conversation_context", "")
-                )
-                agent_results[agent_type]["response"] = agent_response
-
+            if agent_type in agent_errors:
+                state["agent_flow"].append({
+                    "step": f"{agent_type}_agent",
+                    "action": f"{display_name}",
+                    "detail": f"ERROR: {agent_errors[agent_type]}",
+                    "status": "error",
+                    "color": exchange_result["agent_info"]["color"],
+                    "scopes": exchange_result.get("scopes", [])
+                })
+            elif exchange_result["success"] and not exchange_result.get("access_denied"):
                 state["agent_flow"].append({
                     "step": f"{agent_type}_agent",
                     "action": f"{display_name}",
@@ -492,16 +891,56 @@ Return ONLY the JSON object, no other text."""
         state["agent_results"] = agent_results
         return state
 
+    async def _invoke_agent_bounded(
+        self,
+        agent_type: str,
+        message_lower: str,
+        exchange_result: Dict[str, Any],
+        full_context_lower: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Invoke an agent under the shared concurrency limit and a timeout.
+
+        Returns (response, None) on success or (None, error) on failure, so one
+        failing agent doesn't fail the others gathered with it.
+
+        The handler runs in a worker thread, which a timeout can't stop - so
+        the concurrency slot is held until the thread finishes, and agents
+        granted a write scope are waited on in full rather than reported as
+        failed while their update may still be applied.
+        """
+        await _agent_semaphore.acquire()
+        work = asyncio.ensure_future(
+            self._invoke_agent(agent_type, message_lower, exchange_result, full_context_lower)
+        )
+        work.add_done_callback(_release_agent_slot)
+
+        may_write = any(not scope.endswith(":read") for scope in exchange_result.get("scopes", []))
+        timeout = None if may_write else AGENT_TIMEOUT_SECONDS
+        try:
+            # Shielded, so a timeout stops the wait without cancelling the work
+            response = await asyncio.wait_for(asyncio.shield(work), timeout=timeout)
+            return response, None
+        except asyncio.TimeoutError:
+            logger.error(f"[{agent_type}] Agent timed out after {AGENT_TIMEOUT_SECONDS}s")
+            return None, f"Timed out after {AGENT_TIMEOUT_SECONDS:g}s"
+        except Exception as e:
+            logger.error(f"[{agent_type}] Agent failed: {e}")
+            return None, str(e)
+
     async def _invoke_agent(
         self,
         agent_type: str,
-        message: str,
+        message_lower: str,
         exchange_result: Dict[str, Any],
-        conversation_context: str = ""
+        full_context_lower: str
     ) -> str:
         """
         Invoke a specific agent to process the request using real data.
 
+        Takes the lowercased message and the lowercased conversation context
+        plus message, as computed once per turn in the workflow state.
+
         Uses the demo_store to get/modify actual data based on:
         1. The agent type (inventory, pricing, customer, sales)
         2. The user's message intent
@@ -510,22 +949,23 @@ Return ONLY the JSON object, no other text."""
         agent_name = exchange_result["agent_info"]["name"]
         scopes = exchange_result.get("scopes", [])
 
-        # Get real data based on agent type
-        data = self._execute_agent_action(agent_type, message, scopes, conversation_context)
+        # Get real data based on agent type. The handlers are synchronous, so run
+        # them in a worker thread - that keeps the event loop free and lets the
+        # timeout and concurrency limit in _invoke_agent_bounded take effect
+        data = await asyncio.to_thread(
+            self._execute_agent_action, agent_type, message_lower, scopes, full_context_lower
+        )
 
         return f"[{agent_name}]\n{data}"
 
     def _execute_agent_action(
         self,
         agent_type: str,
-        message: str,
+        message_lower: str,
         scopes: List[str],
-        conversation_context: str = ""
+        full_context: str
     ) -> str:
-        """Execute the appropriate action based on agent type and message intent."""
-        message_lower = message.lower()
-        full_context = f"{conversation_context}\n{message}".lower()
-
+        """Execute the appropriate action based on agent type and message intent (lowercased inputs)."""
         if agent_type == AGENT_INVENTORY:
             return self._handle_inventory_action(message_lower, scopes, full_context)
         elif agent_type == AGENT_PRICING:
@@ -541,8 +981,7 @@ Return ONLY the JSON object, no other text."""
         """Handle inventory-related actions with real data."""
 
         # Check for write operations (increase, decrease, update, add)
-        write_keywords = ["increase", "decrease", "update", "add", "set", "adjust", "reduce", "remove"]
-        is_write_operation = any(kw in context for kw in write_keywords)
+        is_write_operation = any(kw in context for kw in _INVENTORY_WRITE_KEYWORDS)
 
         if is_write_operation:
             if "inventory:write" in scopes:
@@ -560,145 +999,66 @@ Return ONLY the JSON object, no other text."""
                 )
 
         # Check for low stock / alerts
-        if any(kw in message for kw in ["low stock", "alert", "reorder", "warning"]):
+        if any(kw in message for kw in _INVENTORY_ALERT_KEYWORDS):
             low_stock = demo_store.get_low_stock_items()
             if not low_stock:
                 return "✅ No low stock alerts - all inventory levels are good!"
             lines = [f"⚠️ **Low Stock Alert - {len(low_stock)} items need attention:**\n"]
-            for item in low_stock:
-                lines.append(f"- 🔴 **{item['name']}**: {item['quantity']} units (reorder point: {item['reorder_point']})")
+            lines.extend(
+                f"- 🔴 **{item['name']}**: {item['quantity']} units (reorder point: {item['reorder_point']})"
+                for item in low_stock
+            )
             return "\n".join(lines)
 
         # Check for specific product search
-        product_keywords = ["basketball", "hoop", "net", "uniform", "jersey", "shoe", "training", "backboard", "rim"]
-        for keyword in product_keywords:
+        for keyword in _INVENTORY_PRODUCT_KEYWORDS:
             if keyword in message:
                 results = demo_store.search_inventory(keyword)
                 if results:
                     lines = [f"**{keyword.title()} Inventory:**\n"]
-                    total_qty = 0
-                    for item in results:
-                        status_icon = "🔴" if item['status'] == 'low' else "🟢"
-                        lines.append(f"- {status_icon} {item['name']}: {item['quantity']:,} units")
-                        total_qty += item['quantity']
+                    lines.extend(
+                        f"- {STATUS_ICON.get(item['status'], '🟢')} {item['name']}: {item['quantity']:,} units"
+                        for item in results
+                    )
+                    total_qty = sum(item['quantity'] for item in results)
                     lines.append(f"\n**Total: {total_qty:,} units across {len(results)} products**")
                     return "\n".join(lines)
 
         # Default: return inventory summary
-        summary = demo_store.get_inventory_summary()
-        lines = [
-            "**ProGear Basketball - Inventory Summary**\n",
-            f"Total Products: {summary['total_products']}",
-            f"Total Items in Stock: {summary['total_items']:,}",
-            f"Total Inventory Value: ${summary['total_value']:,.2f}",
-        ]
-        if summary['low_stock_count'] > 0:
-            lines.append(f"⚠️ Low Stock Alerts: {summary['low_stock_count']}")
-
-        lines.append("\n**By Category:**")
-        for category, data in summary['by_category'].items():
-            lines.append(f"- {category}: {data['total_quantity']:,} units")
-
-        return "\n".join(lines)
+        return _cached_render("inventory_summary", _render_inventory_summary)
 
     def _execute_inventory_write(self, message: str, context: str) -> str:
         """Execute an inventory write operation."""
-        import re
-
         # Try to find product name and quantity from context
         # Look for patterns like "increase X by Y" or "add Y to X" or "increase X inventory by Y"
 
         # Find quantity (look for numbers)
-        qty_match = re.search(r'(\d+)\s*(?:units?|%)?', context)
+        qty_match = _QTY_RE.search(context)
         quantity = int(qty_match.group(1)) if qty_match else 100  # Default to 100 if not found
 
         # Check if it's a percentage increase
         is_percentage = '%' in context or 'percent' in context
 
         # Determine operation
-        if any(kw in context for kw in ["decrease", "reduce", "remove", "subtract"]):
+        if any(kw in context for kw in _INVENTORY_DECREASE_KEYWORDS):
             operation = "decrease"
-        elif any(kw in context for kw in ["increase", "add", "restock", "replenish"]):
+        elif any(kw in context for kw in _INVENTORY_INCREASE_KEYWORDS):
             operation = "increase"
         else:
             operation = "set"
 
         # Try to identify the product
-        # Check common product references
-        product_mappings = {
-            "pro arena": "Pro Arena Hoop System",
-            "arena hoop": "Pro Arena Hoop System",
-            "pro game basketball": "Pro Game Basketball",
-            "pro game": "Pro Game Basketball",
-            "composite basketball": "Pro Composite Basketball",
-            "pro composite": "Pro Composite Basketball",
-            "women's basketball": "Women's Official Basketball",
-            "women's official": "Women's Official Basketball",
-            "youth size 5": "Youth Size 5 Basketball",
-            "youth size 4": "Youth Size 4 Basketball",
-            "indoor basketball": "Indoor Premium Basketball",
-            "indoor premium": "Indoor Premium Basketball",
-            "outdoor basketball": "Outdoor Rubber Basketball",
-            "outdoor rubber": "Outdoor Rubber Basketball",
-            "training basketball": "Training Heavy Basketball",
-            "training heavy": "Training Heavy Basketball",
-            "portable hoop": "Portable Hoop System",
-            "wall mount": "Wall-Mount Hoop",
-            "wall-mount": "Wall-Mount Hoop",
-            "youth hoop": "Youth Adjustable Hoop",
-            "breakaway rim": "Breakaway Rim Pro",
-            "backboard": "Replacement Backboard 72\"",
-            "replacement backboard": "Replacement Backboard 72\"",
-            "competition net": "Pro Competition Net (White)",
-            "chain net": "Heavy Duty Chain Net",
-            "ball pump": "Ball Pump Pro",
-            "ball bag": "Ball Bag (holds 10)",
-            "ball rack": "Ball Rack (holds 16)",
-            "game jersey": "Pro Game Jersey",
-            "pro jersey": "Pro Game Jersey",
-            "game shorts": "Pro Game Shorts",
-            "pro shorts": "Pro Game Shorts",
-            "practice jersey": "Reversible Practice Jersey",
-            "reversible jersey": "Reversible Practice Jersey",
-            "warm-up jacket": "Warm-Up Jacket",
-            "warmup jacket": "Warm-Up Jacket",
-            "warm-up pants": "Warm-Up Pants",
-            "warmup pants": "Warm-Up Pants",
-            "shooting shirt": "Shooting Shirt",
-            "team hoodie": "Team Hoodie",
-            "hoodie": "Team Hoodie",
-            "practice shorts": "Practice Shorts",
-            "agility cones": "Agility Cones (set of 20)",
-            "cones": "Agility Cones (set of 20)",
-            "agility ladder": "Agility Ladder",
-            "ladder": "Agility Ladder",
-            "dribble goggles": "Dribble Goggles",
-            "goggles": "Dribble Goggles",
-            "resistance bands": "Resistance Bands Set",
-            "shot arc": "Shot Arc Trainer",
-            "arc trainer": "Shot Arc Trainer",
-            "slide trainer": "Defensive Slide Trainer",
-            "defensive slide": "Defensive Slide Trainer",
-            "court shoe": "Pro Court Basketball Shoe",
-            "basketball shoe": "Pro Court Basketball Shoe",
-            "youth shoe": "Youth Basketball Shoe",
-            "training shoe": "Training Shoe",
-            "referee shoe": "Referee Shoe",
-        }
-
+        # Check common product references - earlier mappings take priority
         product_name = None
-        for pattern, name in product_mappings.items():
-            if pattern in context:
-                product_name = name
-                break
+        matched = _PRODUCT_MATCHER.scan(context)
+        if matched:
+            product_name = _PRODUCT_NAMES[min(matched)]
 
         if not product_name:
             # Try to find from the inventory
-            results = demo_store.search_inventory("")
-            for item in results:
-                if item['name'].lower() in context:
-                    product_name = item['name']
-                    break
+            item = demo_store.find_in_text(context)
+            if item:
+                product_name = item['name']
 
         if not product_name:
             return "I couldn't identify which product to update. Please specify the product name."
@@ -720,7 +1080,7 @@ Return ONLY the JSON object, no other text."""
             return f"Error: {result['error']}"
 
         change_text = f"+{result['change']}" if result['change'] > 0 else str(result['change'])
-        status_icon = "🔴" if result['status'] == 'low' else "🟢"
+        status_icon = STATUS_ICON.get(result['status'], "🟢")
 
         return (
             f"**✅ Inventory Updated Successfully**\n\n"
@@ -735,38 +1095,28 @@ Return ONLY the JSON object, no other text."""
         """Handle pricing-related actions with real data."""
 
         # Check for discount calculation
-        if any(kw in message for kw in ["discount", "calculate", "total"]):
+        if any(kw in message for kw in _PRICING_DISCOUNT_KEYWORDS):
             # Try to find customer and quantity
-            customers = demo_store.get_all_customers()
-            for customer in customers.values():
-                if customer['name'].lower() in context:
-                    # Found a customer, look for quantity
-                    import re
-                    qty_match = re.search(r'(\d+)\s*(?:units?)?', context)
-                    quantity = int(qty_match.group(1)) if qty_match else 100
-
-                    discount_info = demo_store.calculate_total_discount(customer['tier'], quantity)
-                    return (
-                        f"**Discount Calculation for {customer['name']}**\n\n"
-                        f"- Customer Tier: {discount_info['tier']}\n"
-                        f"- Tier Discount: {discount_info['tier_discount']}%\n"
-                        f"- Order Quantity: {discount_info['quantity']:,} units\n"
-                        f"- Volume Discount: {discount_info['volume_discount']}%\n"
-                        f"- **Total Discount: {discount_info['total_discount']}%**"
-                    )
+            customer = demo_store.match_customer(context)
+            if customer:
+                # Found a customer, look for quantity
+                qty_match = _QTY_RE.search(context)
+                quantity = int(qty_match.group(1)) if qty_match else 100
+
+                discount_info = demo_store.calculate_total_discount(customer['tier'], quantity)
+                return (
+                    f"**Discount Calculation for {customer['name']}**\n\n"
+                    f"- Customer Tier: {discount_info['tier']}\n"
+                    f"- Tier Discount: {discount_info['tier_discount']}%\n"
+                    f"- Order Quantity: {discount_info['quantity']:,} units\n"
+                    f"- Volume Discount: {discount_info['volume_discount']}%\n"
+                    f"- **Total Discount: {discount_info['total_discount']}%**"
+                )
 
         # Check for specific product pricing
-        product_keywords = ["basketball", "hoop", "net", "uniform", "jersey", "shoe", "training"]
-        for keyword in product_keywords:
+        for keyword, category in _PRICING_KEYWORD_CATEGORY.items():
             if keyword in message:
-                pricing_list = demo_store.get_pricing_by_category(
-                    "Basketballs" if keyword == "basketball" else
-                    "Hoops & Backboards" if keyword in ["hoop", "backboard"] else
-                    "Nets & Accessories" if keyword == "net" else
-                    "Uniforms & Apparel" if keyword in ["uniform", "jersey"] else
-                    "Footwear" if keyword == "shoe" else
-                    "Training Equipment"
-                )
+                pricing_list = demo_store.get_pricing_by_category(category)
                 if pricing_list:
                     lines = [f"**{keyword.title()} Pricing:**\n"]
                     has_margin_access = "pricing:margin" in scopes
@@ -783,7 +1133,7 @@ Return ONLY the JSON object, no other text."""
                     return "\n".join(lines)
 
         # Check for margin queries - requires pricing:margin scope
-        if "margin" in message or "profit" in message:
+        if any(kw in message for kw in _PRICING_MARGIN_KEYWORDS):
             if "pricing:margin" not in scopes:
                 return (
                     "⚠️ **Access Denied: Margin Data Restricted**\n\n"
@@ -794,72 +1144,49 @@ Return ONLY the JSON object, no other text."""
                     "I can still help you with product prices and discount structures."
                 )
 
-            # Get all pricing and calculate averages by category
-            inventory = demo_store.get_all_inventory()
-            pricing = demo_store.get_all_pricing()
-
-            categories = {}
-            for sku, item in inventory.items():
-                if sku in pricing:
-                    cat = item['category']
-                    if cat not in categories:
-                        categories[cat] = []
-                    categories[cat].append(pricing[sku]['margin'])
-
             lines = ["**Margin Analysis by Category:**\n"]
-            for cat, margins in sorted(categories.items()):
-                avg = sum(margins) / len(margins)
+            for cat, avg in sorted(demo_store.get_category_margin_averages().items()):
                 lines.append(f"- {cat}: {avg:.1f}% average margin")
 
             return "\n".join(lines)
 
         # Default: return discount structure
-        discounts = demo_store.get_discount_structure()
-        return (
-            "**ProGear Basketball - Pricing & Discounts**\n\n"
-            "**Tier Discounts:**\n"
-            + "\n".join(f"- {tier}: {disc}%" for tier, disc in discounts.get('tier_discounts', {}).items())
-            + "\n\n**Volume Discounts:**\n"
-            + "\n".join(f"- {qty}+ units: {disc}%" for qty, disc in sorted(discounts.get('volume_discounts', {}).items(), key=lambda x: int(x[0])))
-            + "\n\n*Discounts are combinable (e.g., Platinum + 500 units = 25% off)*"
-        )
+        return _cached_render("discount_structure", _render_discount_structure)
 
     def _handle_customer_action(self, message: str, scopes: List[str], context: str) -> str:
         """Handle customer-related actions with real data."""
 
         # Check for specific customer lookup
-        customers = demo_store.get_all_customers()
-        for customer in customers.values():
-            if customer['name'].lower() in context or customer['contact'].lower() in context:
-                tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}.get(customer['tier'], "")
-                return (
-                    f"**{customer['name']}** {tier_emoji}\n"
-                    f"- Customer ID: {customer['id']}\n"
-                    f"- Tier: {customer['tier']}\n"
-                    f"- Contact: {customer['contact']}\n"
-                    f"- Email: {customer['email']}\n"
-                    f"- Location: {customer['location']}\n"
-                    f"- Total Spent: ${customer['total_spent']:,}"
-                )
+        customer = demo_store.match_customer(context, include_contact=True)
+        if customer:
+            tier_emoji = TIER_EMOJI.get(customer['tier'], "")
+            return (
+                f"**{customer['name']}** {tier_emoji}\n"
+                f"- Customer ID: {customer['id']}\n"
+                f"- Tier: {customer['tier']}\n"
+                f"- Contact: {customer['contact']}\n"
+                f"- Email: {customer['email']}\n"
+                f"- Location: {customer['location']}\n"
+                f"- Total Spent: ${customer['total_spent']:,}"
+            )
 
         # Check for tier-based query
-        for tier in ["platinum", "gold", "silver", "bronze"]:
-            if tier in message:
-                tier_customers = demo_store.get_customers_by_tier(tier.title())
+        for keyword, tier in _TIER_KEYWORDS.items():
+            if keyword in message:
+                tier_customers = demo_store.get_customers_by_tier_sorted(tier)
                 if tier_customers:
-                    tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}.get(tier.title(), "")
-                    customers_sorted = sorted(tier_customers, key=lambda x: x['total_spent'], reverse=True)
-                    lines = [f"**{tier_emoji} {tier.title()} Tier Customers ({len(tier_customers)}):**\n"]
-                    total = 0
-                    for c in customers_sorted:
-                        lines.append(f"- **{c['name']}** - ${c['total_spent']:,} ({c['location']})")
-                        total += c['total_spent']
-                    lines.append(f"\n**Total {tier.title()} Revenue: ${total:,}**")
+                    tier_emoji = TIER_EMOJI[tier]
+                    lines = [f"**{tier_emoji} {tier} Tier Customers ({len(tier_customers)}):**\n"]
+                    lines.extend(
+                        f"- **{c['name']}** - ${c['total_spent']:,} ({c['location']})"
+                        for c in tier_customers
+                    )
+                    total = sum(c['total_spent'] for c in tier_customers)
+                    lines.append(f"\n**Total {tier} Revenue: ${total:,}**")
                     return "\n".join(lines)
 
         # Default: customer summary
         summary = demo_store.get_customer_summary()
-        tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}
 
         lines = [
             "**ProGear Basketball - Customer Summary**\n",
@@ -868,10 +1195,9 @@ Return ONLY the JSON object, no other text."""
             "\n**By Tier:**"
         ]
 
-        for tier in ["Platinum", "Gold", "Silver", "Bronze"]:
+        for tier, emoji in TIER_EMOJI.items():
             if tier in summary['by_tier']:
                 data = summary['by_tier'][tier]
-                emoji = tier_emoji.get(tier, "")
                 lines.append(f"- {emoji} {tier}: {data['count']} customers, ${data['total_spent']:,}")
 
         return "\n".join(lines)
@@ -879,31 +1205,7 @@ Return ONLY the JSON object, no other text."""
     def _handle_sales_action(self, message: str, scopes: List[str], context: str) -> str:
         """Handle sales-related actions."""
         # Sales data is more complex - for now return summary with real customer/inventory context
-
-        summary = demo_store.get_customer_summary()
-        inv_summary = demo_store.get_inventory_summary()
-
-        # Get top customers for orders context
-        platinum = demo_store.get_customers_by_tier("Platinum")
-        top_customer = max(platinum, key=lambda x: x['total_spent']) if platinum else None
-
-        lines = [
-            "**ProGear Basketball - Sales Overview**\n",
-            f"Total Customer Base: {summary['total_customers']} customers",
-            f"Total Revenue: ${summary['total_revenue']:,}",
-            f"Inventory Value: ${inv_summary['total_value']:,.2f}",
-        ]
-
-        if top_customer:
-            lines.append(f"\n**Top Customer:** {top_customer['name']} (${top_customer['total_spent']:,})")
-
-        # Add discount info for context
-        discounts = demo_store.get_discount_structure()
-        lines.append("\n**Available Discounts:**")
-        lines.append(f"- Tier-based: up to {max(discounts.get('tier_discounts', {}).values() or [0])}%")
-        lines.append(f"- Volume-based: up to {max(discounts.get('volume_discounts', {}).values() or [0])}%")
-
-        return "\n".join(lines)
+        return _cached_render("sales_overview", _render_sales_overview)
 
     async def _generate_response_node(self, state: WorkflowState) -> WorkflowState:
         """
@@ -915,45 +1217,53 @@ Return ONLY the JSON object, no other text."""
         conversation_context = state.get("conversation_context", "")
 
         # Collect successful responses and denied agents with their scopes
-        responses = []
-        denied_agents = []
-        denied_scopes_by_agent = {}
-
-        for agent_type, result in agent_results.items():
-            if result["success"] and "response" in result:
-                responses.append(result["response"])
-            elif result.get("access_denied"):
-                agent_name = result["agent_info"]["name"]
-                denied_agents.append(agent_name)
-                # Get the scopes that were requested but denied
-                denied_scopes = result.get("requested_scopes", [])
-                if denied_scopes:
-                    denied_scopes_by_agent[agent_name] = denied_scopes
-
-        # Build context section for response synthesis
-        context_section = ""
-        if conversation_context:
-            context_section = f"""
-CONVERSATION HISTORY (for context - understand what "it", "that", "this" refers to):
-{conversation_context}
-
-"""
+        responses = [
+            result["response"]
+            for result in agent_results.values()
+            if result["success"] and "response" in result
+        ]
+        # (agent name, scopes that were requested but denied) - denied agents
+        # are never invoked, so they have no response
+        denied = [
+            (result["agent_info"]["name"], result.get("requested_scopes", []))
+            for result in agent_results.values()
+            if result.get("access_denied")
+        ]
+        denied_agents = [agent_name for agent_name, _ in denied]
 
         # Generate combined response
-        if responses:
+        if len(responses) == 1 and not denied_agents:
+            # A single agent's answer is already formatted for the user - there
+            # is nothing to combine, so skip the synthesis round-trip and just
+            # drop the "[Agent Name]" line _invoke_agent puts in front of it
+            final_response = responses[0].partition("\n")[2]
+
+        elif responses:
             # Use LLM to create natural combined response
             combined_data = "\n\n".join(responses)
-            synthesis_prompt = f"""Based on the following agent responses, provide a helpful, natural answer
-to the user's question: "{state['user_message']}"
-{context_section}
-Agent responses:
-{combined_data}
-
-{"Note: The user was denied access to these agents: " + ", ".join(denied_agents) if denied_agents else ""}
-
-Provide a concise, helpful response that combines the relevant information.
-If the user's message refers to something from the conversation history (like "it", "that", "yes"), use the context to understand what they mean.
-If some agents were denied, acknowledge what information is missing but focus on what IS available."""
+            # Only include the history and denial parts (and the instructions
+            # about them) when there is something to say - fewer input tokens
+            synthesis_prompt = "\n\n".join(part for part in [
+                "Based on the following agent responses, provide a helpful, natural answer\n"
+                f"to the user's question: \"{state['user_message']}\"",
+                conversation_context and (
+                    'CONVERSATION HISTORY (for context - understand what "it", "that", "this" refers to):\n'
+                    f"{conversation_context}"
+                ),
+                f"Agent responses:\n{combined_data}",
+                denied_agents and "Note: The user was denied access to these agents: " + ", ".join(denied_agents),
+                "\n".join(line for line in [
+                    "Provide a concise, helpful response that combines the relevant information.",
+                    conversation_context and (
+                        'If the user\'s message refers to something from the conversation history '
+                        '(like "it", "that", "yes"), use the context to understand what they mean.'
+                    ),
+                    denied_agents and (
+                        "If some agents were denied, acknowledge what information is missing "
+                        "but focus on what IS available."
+                    ),
+                ] if line),
+            ] if part)
 
             try:
                 response = await self.response_llm.ainvoke([
@@ -967,15 +1277,10 @@ If some agents were denied, acknowledge what information is missing but focus on
 
         elif denied_agents:
             # Build a clear message about which scopes the user doesn't have access to
-            scope_details = []
-            for agent_name in denied_agents:
-                scopes = denied_scopes_by_agent.get(agent_name, [])
-                if scopes:
-                    scope_details.append(f"  - {agent_name}: {', '.join(scopes)}")
-                else:
-                    scope_details.append(f"  - {agent_name}")
-
-            scope_info = "\n".join(scope_details)
+            scope_info = "\n".join(
+                f"  - {agent_name}: {', '.join(scopes)}" if scopes else f"  - {agent_name}"
+                for agent_name, scopes in denied
+            )
             final_response = (
                 f"You do not have access to the following scopes required for this request:\n\n"
                 f"{scope_info}\n\n"
@@ -997,6 +1302,24 @@ If some agents were denied, acknowledge what information is missing but focus on
 
         return state
 
+    def _initial_state(self, message: str, conversation_context: str) -> WorkflowState:
+        """Build the workflow state for a new user message."""
+        return {
+            "messages": [],
+            "user_message": message,
+            "conversation_context": conversation_context,
+            "message_lower": message.lower(),
+            "full_context_lower": f"{conversation_context}\n{message}".lower(),
+            "user_info": self.user_info,
+            "user_token": self.user_token,
+            "agents_to_invoke": [],
+            "agent_scopes": {},  # Will be populated by router based on intent
+            "agent_results": {},
+            "agent_flow": [],
+            "token_exchanges": [],
+            "final_response": None,
+        }
+
     async def process(self, message: str, conversation_context: str = "") -> Dict[str, Any]:
         """
         Process a user message through the orchestrator.
@@ -1011,26 +1334,40 @@ If some agents were denied, acknowledge what information is missing but focus on
             - agent_flow: Steps taken
             - token_exchanges: Token exchange results per agent
         """
-        # Initialize state
-        initial_state: WorkflowState = {
-            "messages": [],
-            "user_message": message,
-            "conversation_context": conversation_context,
-            "user_info": self.user_info,
-            "user_token": self.user_token,
-            "agents_to_invoke": [],
-            "agent_scopes": {},  # Will be populated by router based on intent
-            "agent_results": {},
-            "agent_flow": [],
-            "token_exchanges": [],
-            "final_response": None,
-        }
-
         # Run the workflow
-        final_state = await self.workflow.ainvoke(initial_state)
+        final_state = await self.workflow.ainvoke(self._initial_state(message, conversation_context))
 
         return {
             "content": final_state["final_response"],
             "agent_flow": final_state["agent_flow"],
             "token_exchanges": final_state["token_exchanges"],
         }
+
+    async def stream(self, message: str, conversation_context: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message, yielding the response as it is generated.
+
+        Yields:
+            {"type": "token", "content": str} for each chunk of the synthesized
+            response, then one {"type": "done", ...} event with the same fields
+            as process(). Responses that skip the LLM arrive only in "done".
+        """
+        final_state = None
+        async for event in self.workflow.astream_events(
+            self._initial_state(message, conversation_context), version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_stream" and RESPONSE_LLM_TAG in event.get("tags", []):
+                text = _chunk_text(event["data"]["chunk"].content)
+                if text:
+                    yield {"type": "token", "content": text}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # End of the root run - its output is the final workflow state
+                final_state = event["data"]["output"]
+
+        yield {
+            "type": "done",
+            "content": final_state["final_response"],
+            "agent_flow": final_state["agent_flow"],
+            "token_exchanges": final_state["token_exchanges"],
+        }
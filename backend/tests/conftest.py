@@ -0,0 +1,6 @@
+"""Shared pytest setup - backend modules import from the backend/ root."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,53 @@
+"""Tests for the conversation store's session limit and expiry."""
+
+from api.conversation_store import ConversationStore
+
+
+def _has_session(store, session_id):
+    return bool(store.get_history(session_id))
+
+
+def test_session_limit_is_store_wide():
+    # Fewer sessions than shards - a per-shard limit would keep one per shard
+    store = ConversationStore(max_sessions=3, num_shards=16)
+    for i in range(10):
+        store.add_message(f"s{i}", "user", "hi")
+
+    kept = [f"s{i}" for i in range(10) if _has_session(store, f"s{i}")]
+
+    assert kept == ["s7", "s8", "s9"]
+
+
+def test_eviction_removes_least_recently_active_session():
+    store = ConversationStore(max_sessions=3, num_shards=4)
+    for session_id in ("a", "b", "c"):
+        store.add_message(session_id, "user", "hi")
+    store.add_message("a", "user", "still here")
+
+    store.add_message("d", "user", "hi")
+
+    assert not _has_session(store, "b")
+    assert all(_has_session(store, sid) for sid in ("a", "c", "d"))
+
+
+def test_removed_sessions_free_up_the_limit():
+    store = ConversationStore(max_sessions=2, num_shards=4)
+    store.add_message("a", "user", "hi")
+    store.add_message("b", "user", "hi")
+    store.clear_session("b")
+
+    store.add_message("c", "user", "hi")
+
+    assert _has_session(store, "a") and _has_session(store, "c")
+
+
+def test_expired_session_is_not_resumed_before_the_sweep():
+    store = ConversationStore(ttl_minutes=1, cleanup_interval_seconds=3600)
+    store.add_message("a", "user", "old question")
+    shard, _ = store._shard_for("a")
+    shard["a"].last_activity -= store._ttl_ns + 1
+
+    assert store.get_context_summary("a") == ""
+    assert store.get_or_create_session("a") == "a"
+    assert store.get_history("a") == []
+    assert store._session_count == 1
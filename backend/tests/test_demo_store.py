@@ -0,0 +1,59 @@
+"""Tests for DemoStore persistence."""
+
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from data import demo_store as store_module
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point the store's data files at a temp directory holding the initial data."""
+    shutil.copy(store_module.INITIAL_DATA_FILE, tmp_path / "initial_data.json")
+    live = tmp_path / "live_data.msgpack"
+    monkeypatch.setattr(store_module, "MSGPACK_AVAILABLE", True)
+    monkeypatch.setattr(store_module, "INITIAL_DATA_FILE", tmp_path / "initial_data.json")
+    monkeypatch.setattr(store_module, "LEGACY_LIVE_DATA_FILE", tmp_path / "live_data.json")
+    monkeypatch.setattr(store_module, "LIVE_DATA_FILE", live)
+    monkeypatch.setattr(store_module, "LIVE_DATA_TMP_FILE", live.with_name(live.name + ".tmp"))
+    return tmp_path
+
+
+def test_legacy_json_live_data_is_migrated_to_msgpack(data_dir):
+    pytest.importorskip("msgpack")
+    saved = json.loads((data_dir / "initial_data.json").read_text())
+    sku = next(iter(saved["inventory"]))
+    saved["inventory"][sku]["quantity"] = 12345
+    (data_dir / "live_data.json").write_text(json.dumps(saved))
+
+    store = store_module.DemoStore()
+
+    assert store.get_inventory_by_sku(sku)["quantity"] == 12345
+    assert (data_dir / "live_data.msgpack").exists()
+    # Loading again reads the migrated msgpack file
+    assert store_module.DemoStore().get_inventory_by_sku(sku)["quantity"] == 12345
+
+
+def test_missing_live_data_falls_back_to_initial(data_dir):
+    pytest.importorskip("msgpack")
+    initial = json.loads((data_dir / "initial_data.json").read_text())
+    sku = next(iter(initial["inventory"]))
+
+    store = store_module.DemoStore()
+
+    assert store.get_inventory_by_sku(sku)["quantity"] == initial["inventory"][sku]["quantity"]
+
+
+def test_concurrent_updates_are_not_lost(data_dir):
+    store = store_module.DemoStore()
+    sku = next(iter(store.get_all_inventory()))
+    start = store.get_inventory_by_sku(sku)["quantity"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: store.update_inventory_quantity(sku, 1, "increase"), range(200)))
+    store.flush()
+
+    assert store.get_inventory_by_sku(sku)["quantity"] == start + 200
@@ -0,0 +1,69 @@
+"""Tests for token exchange retry handling."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("jose")
+
+from auth import multi_agent_auth
+
+
+class _FlakyCall:
+    """Raises the given errors in order, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"request failed with status {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    monkeypatch.setattr(multi_agent_auth, "EXCHANGE_RETRY_DELAYS", (0, 0, 0))
+    return multi_agent_auth.MultiAgentTokenExchange()
+
+
+def _run(exchange, call):
+    return asyncio.run(exchange._call_with_retry("inventory", call))
+
+
+@pytest.mark.parametrize("error", [
+    Exception("invalid_target: audience is not allowed"),
+    Exception("access_denied"),
+    KeyError("expires_in"),
+    _HTTPError(400),
+])
+def test_permanent_error_is_not_retried(exchange, error):
+    call = _FlakyCall(error)
+
+    with pytest.raises(type(error)):
+        _run(exchange, call)
+
+    assert call.calls == 1
+
+
+@pytest.mark.parametrize("error", [
+    _HTTPError(503),
+    Exception("HTTP 502 Bad Gateway"),
+    Exception("temporarily_unavailable"),
+    TimeoutError(),
+    ConnectionResetError(),
+])
+def test_transient_error_is_retried(exchange, error):
+    call = _FlakyCall(error, error)
+
+    assert _run(exchange, call) == "ok"
+    assert call.calls == 3
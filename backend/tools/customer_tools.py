@@ -7,7 +7,7 @@ scopes from the MCP token to execute.
 
 from typing import Optional
 from langchain_core.tools import tool
-from data.demo_store import demo_store
+from data.demo_store import demo_store, TIER_EMOJI
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,7 +29,7 @@ def get_customer(customer_name: str) -> str:
     if not customer:
         return f"Customer not found: {customer_name}"
 
-    tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}.get(customer['tier'], "")
+    tier_emoji = TIER_EMOJI.get(customer['tier'], "")
 
     return (
         f"**{customer['name']}** {tier_emoji}\n"
@@ -58,16 +58,13 @@ def search_customers(query: str) -> str:
     if not results:
         return f"No customers found matching: {query}"
 
-    tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}
-
     lines = [f"**Found {len(results)} customers matching '{query}':**\n"]
-    for customer in results:
-        emoji = tier_emoji.get(customer['tier'], "")
-        lines.append(
-            f"- {emoji} **{customer['name']}** ({customer['tier']})\n"
-            f"  Contact: {customer['contact']} | Location: {customer['location']} | "
-            f"Spent: ${customer['total_spent']:,}"
-        )
+    lines.extend(
+        f"- {TIER_EMOJI.get(customer['tier'], '')} **{customer['name']}** ({customer['tier']})\n"
+        f"  Contact: {customer['contact']} | Location: {customer['location']} | "
+        f"Spent: ${customer['total_spent']:,}"
+        for customer in results
+    )
 
     return "\n".join(lines)
 
@@ -84,24 +81,19 @@ def get_customers_by_tier(tier: str) -> str:
     Returns:
         List of customers in that tier
     """
-    customers = demo_store.get_customers_by_tier(tier)
+    customers = demo_store.get_customers_by_tier_sorted(tier)
     if not customers:
         return f"No customers found in tier: {tier}"
 
-    tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}.get(tier, "")
-
-    # Sort by total spent descending
-    customers_sorted = sorted(customers, key=lambda x: x['total_spent'], reverse=True)
+    tier_emoji = TIER_EMOJI.get(tier, "")
 
     lines = [f"**{tier_emoji} {tier} Tier Customers ({len(customers)}):**\n"]
-    total_spent = 0
-
-    for customer in customers_sorted:
-        total_spent += customer['total_spent']
-        lines.append(
-            f"- **{customer['name']}** - ${customer['total_spent']:,}\n"
-            f"  {customer['contact']} | {customer['location']}"
-        )
+    lines.extend(
+        f"- **{customer['name']}** - ${customer['total_spent']:,}\n"
+        f"  {customer['contact']} | {customer['location']}"
+        for customer in customers
+    )
+    total_spent = sum(customer['total_spent'] for customer in customers)
 
     lines.append(f"\n**Total {tier} Revenue: ${total_spent:,}**")
 
@@ -119,7 +111,6 @@ def get_customer_summary() -> str:
     """
     summary = demo_store.get_customer_summary()
 
-    tier_emoji = {"Platinum": "💎", "Gold": "🥇", "Silver": "🥈", "Bronze": "🥉"}
     tier_order = ["Platinum", "Gold", "Silver", "Bronze"]
 
     lines = [
@@ -132,7 +123,7 @@ def get_customer_summary() -> str:
     for tier in tier_order:
         if tier in summary['by_tier']:
             data = summary['by_tier'][tier]
-            emoji = tier_emoji.get(tier, "")
+            emoji = TIER_EMOJI.get(tier, "")
             lines.append(
                 f"- {emoji} {tier}: {data['count']} customers, "
                 f"${data['total_spent']:,} total"
@@ -5,14 +5,28 @@ These tools interact with the demo data store and require appropriate
 scopes from the MCP token to execute.
 """
 
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from langchain_core.tools import tool
-from data.demo_store import demo_store
+from data.demo_store import demo_store, STATUS_ICON
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _render_update(result: Dict[str, Any], header: str, change_note: str = "") -> str:
+    """Render the confirmation for a successful update_inventory_quantity() result."""
+    change_text = f"+{result['change']}" if result['change'] > 0 else str(result['change'])
+    status_icon = STATUS_ICON.get(result['status'], "🟢")
+    return (
+        f"**{header}**\n\n"
+        f"**{result['name']}** (SKU: {result['sku']})\n"
+        f"- Previous: {result['previous_quantity']:,} units\n"
+        f"- Change: {change_text} units{change_note}\n"
+        f"- New: {result['new_quantity']:,} units\n"
+        f"- Status: {status_icon} {result['status'].upper()}"
+    )
+
+
 @tool
 def get_inventory(product_name: str) -> str:
     """
@@ -49,17 +63,18 @@ def search_inventory(query: str) -> str:
     Returns:
         List of matching products with quantities
     """
-    results = demo_store.search_inventory(query)
+    results, total = demo_store.search_inventory_limited(query, 15)  # Limit to 15 results
     if not results:
         return f"No products found matching: {query}"
 
-    lines = [f"**Found {len(results)} products matching '{query}':**\n"]
-    for item in results[:15]:  # Limit to 15 results
-        status_icon = "🔴" if item['status'] == 'low' else "🟢"
-        lines.append(f"- {status_icon} {item['name']}: {item['quantity']:,} units ({item['category']})")
+    lines = [f"**Found {total} products matching '{query}':**\n"]
+    lines.extend(
+        f"- {STATUS_ICON.get(item['status'], '🟢')} {item['name']}: {item['quantity']:,} units ({item['category']})"
+        for item in results
+    )
 
-    if len(results) > 15:
-        lines.append(f"\n... and {len(results) - 15} more")
+    if total > 15:
+        lines.append(f"\n... and {total - 15} more")
 
     return "\n".join(lines)
 
@@ -89,17 +104,7 @@ def update_inventory(product_name: str, quantity: int, operation: str = "increas
     if "error" in result:
         return f"Error: {result['error']}"
 
-    change_text = f"+{result['change']}" if result['change'] > 0 else str(result['change'])
-    status_icon = "🔴" if result['status'] == 'low' else "🟢"
-
-    return (
-        f"**Inventory Updated Successfully**\n\n"
-        f"**{result['name']}** (SKU: {result['sku']})\n"
-        f"- Previous: {result['previous_quantity']:,} units\n"
-        f"- Change: {change_text} units\n"
-        f"- New: {result['new_quantity']:,} units\n"
-        f"- Status: {status_icon} {result['status'].upper()}"
-    )
+    return _render_update(result, "Inventory Updated Successfully")
 
 
 @tool
@@ -135,18 +140,8 @@ def update_inventory_by_percentage(product_name: str, percentage: float, operati
     if "error" in result:
         return f"Error: {result['error']}"
 
-    change_text = f"+{result['change']}" if result['change'] > 0 else str(result['change'])
-    status_icon = "🔴" if result['status'] == 'low' else "🟢"
     pct_text = f"+{percentage}%" if operation == "increase" else f"-{percentage}%"
-
-    return (
-        f"**Inventory Updated by {pct_text}**\n\n"
-        f"**{result['name']}** (SKU: {result['sku']})\n"
-        f"- Previous: {result['previous_quantity']:,} units\n"
-        f"- Change: {change_text} units ({pct_text})\n"
-        f"- New: {result['new_quantity']:,} units\n"
-        f"- Status: {status_icon} {result['status'].upper()}"
-    )
+    return _render_update(result, f"Inventory Updated by {pct_text}", f" ({pct_text})")
 
 
 @tool
@@ -163,11 +158,11 @@ def get_low_stock_alerts() -> str:
         return "✅ No low stock alerts - all inventory levels are good!"
 
     lines = [f"**⚠️ Low Stock Alert - {len(low_stock)} items need attention:**\n"]
-    for item in low_stock:
-        lines.append(
-            f"- 🔴 **{item['name']}**: {item['quantity']} units "
-            f"(reorder point: {item['reorder_point']})"
-        )
+    lines.extend(
+        f"- 🔴 **{item['name']}**: {item['quantity']} units "
+        f"(reorder point: {item['reorder_point']})"
+        for item in low_stock
+    )
 
     return "\n".join(lines)
 
@@ -192,11 +187,11 @@ def get_inventory_summary() -> str:
         "\n**By Category:**"
     ]
 
-    for category, data in summary['by_category'].items():
-        lines.append(
-            f"- {category}: {data['count']} products, "
-            f"{data['total_quantity']:,} units (${data['total_value']:,.2f})"
-        )
+    lines.extend(
+        f"- {category}: {data['count']} products, "
+        f"{data['total_quantity']:,} units (${data['total_value']:,.2f})"
+        for category, data in summary['by_category'].items()
+    )
 
     return "\n".join(lines)
 
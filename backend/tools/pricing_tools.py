@@ -184,10 +184,7 @@ def get_pricing_summary() -> str:
         f"{tier}: {disc}%" for tier, disc in discounts.get('tier_discounts', {}).items()
     ))
     lines.append("Volume Discounts: " + ", ".join(
-        f"{qty}+ units: {disc}%" for qty, disc in sorted(
-            discounts.get('volume_discounts', {}).items(),
-            key=lambda x: int(x[0])
-        )
+        f"{qty}+ units: {disc}%" for qty, disc in demo_store.get_volume_discount_tiers()
     ))
 
     return "\n".join(lines)